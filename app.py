@@ -1,16 +1,21 @@
 import streamlit as st
 import config
-from content_generator import ContentGenerator
+from content_generator import invalidate_models
 from image_generator import ImageGenerator
-import os
+from thumbnail_store import ThumbnailHandle, THUMBNAIL_CACHE
+from stock_cache import STOCK_CACHE
+from batch_generator import BatchGenerator, parse_topics, build_bundle
+from model_health import HEALTH
+from rate_limiter import RATE_LIMITER
+from response_cache import RESPONSE_CACHE
+from bootstrap import get_content_generator, warm_up_fonts, get_template_store, get_job_queue, load_custom_templates, start_rerun, finish_rerun
+from html_analytics import analyze_html, check_length
+import functools
 import templates
 import re
 import urllib.parse
 import time
-import base64
-import requests
 import io
-import json
 import streamlit.components.v1 as components
 
 # Page Config
@@ -20,6 +25,7 @@ st.set_page_config(
     layout="wide"
 )
 
+@functools.lru_cache(maxsize=8)
 def pretty_print_html(html_content):
     """
     HTML 코드를 줄바꿈해서 읽기 좋게 만들어주는 함수.
@@ -36,40 +42,71 @@ def pretty_print_html(html_content):
 def get_word_count_details(html_content):
     """
     Returns a dictionary with various word count details.
+    Counts come from the memoized single-pass analyzer (script/style text is not counted).
     """
-    # Remove HTML tags
-    clean_text = re.sub(r'<[^>]+>', '', html_content)
-    
-    # Total characters (including spaces)
-    total_with_spaces = len(clean_text)
-    
-    # Characters excluding whitespaces
-    total_no_spaces = len(re.sub(r'\s+', '', clean_text))
-    
-    # Korean characters only (Hangul syllables/jamo)
-    korean_only = len(re.findall(r'[가-힣ㄱ-ㅎㅏ-ㅣ]', clean_text))
-    
+    analysis = analyze_html(html_content)
     return {
-        "total_no_spaces": total_no_spaces,
-        "korean_only": korean_only,
-        "total_with_spaces": total_with_spaces
+        "total_no_spaces": analysis["total_no_spaces"],
+        "korean_only": analysis["korean_only"],
+        "total_with_spaces": analysis["total_with_spaces"]
     }
 
-def generate_blog_post(topic, prompt_template, api_key=None, selected_model=None):
+def generate_blog_post(topic, prompt_template, api_key=None, selected_model=None, use_cache=True, use_context_cache=False):
     """
     Orchestrates the blog generation process.
     Returns: (blog_data, image_url, error_message)
     """
     # 1. Generate Content
     with st.spinner('🤖 AI가 글을 작성하고 있습니다...'):
-        content_gen = ContentGenerator(api_key=api_key, selected_model=selected_model)
-        blog_data, error_detail = content_gen.generate_blog_post(topic, prompt_template)
+        content_gen = get_content_generator(api_key, selected_model)
+        blog_data, error_detail = content_gen.generate_blog_post(topic, prompt_template, use_cache=use_cache, use_context_cache=use_context_cache)
     
     if not blog_data:
         full_error = f"글 생성에 실패했습니다.\n\n**상세 원인:** {error_detail}"
         return None, None, full_error
 
     # 2. Generate Image URL
+    return blog_data, generate_post_image(blog_data), None
+
+def generate_blog_post_streaming(topic, prompt_template, api_key=None, selected_model=None, use_cache=True, use_context_cache=False):
+    """
+    Streaming variant of generate_blog_post: renders the title and partial HTML while the response arrives.
+    Returns: (blog_data, image_url, error_message)
+    """
+    content_gen = get_content_generator(api_key, selected_model)
+    status_box = st.empty()
+    title_box = st.empty()
+    preview_box = st.empty()
+    status_box.info('🤖 AI가 글을 작성하고 있습니다... (실시간 미리보기)')
+
+    blog_data, error_detail = None, None
+    last_render = 0.0
+    for event in content_gen.generate_blog_post_stream(topic, prompt_template, use_cache=use_cache, use_context_cache=use_context_cache):
+        if event["type"] == "partial":
+            fields = event["fields"]
+            if "title" in fields:
+                title_box.markdown(f"### {fields['title']}")
+            # Throttle re-renders; chunks can arrive faster than the browser repaints
+            if time.time() - last_render > 0.3:
+                preview_box.markdown(event["content"], unsafe_allow_html=True)
+                last_render = time.time()
+        else:
+            blog_data, error_detail = event["data"], event["error"]
+
+    status_box.empty()
+    title_box.empty()
+    preview_box.empty()
+
+    if not blog_data:
+        full_error = f"글 생성에 실패했습니다.\n\n**상세 원인:** {error_detail}"
+        return None, None, full_error
+
+    return blog_data, generate_post_image(blog_data), None
+
+def generate_post_image(blog_data):
+    """
+    Creates the thumbnail for a generated post. Returns the image URL (or None on failure).
+    """
     with st.spinner('🎨 AI가 주제와 관련된 이미지를 생성하고 있습니다...'):
         image_gen = ImageGenerator()
         try:
@@ -86,9 +123,12 @@ def generate_blog_post(topic, prompt_template, api_key=None, selected_model=None
             st.error(f"이미지 URL 생성 실패: {e}")
             image_url = None
 
-    return blog_data, image_url, None
+    return image_url
 
 def main():
+    timer = start_rerun()
+    warm_up_fonts()
+    timer.mark("초기화")
     st.title("✍️ 티스토리 블로그 자동생성기")
     st.markdown("""
     구글 Gemini AI를 활용하여 블로그 주제만 입력하면 **제목, 본문(HTML), 최적화된 이미지**를 자동으로 만들어줍니다.
@@ -115,9 +155,19 @@ def main():
         )
         
         active_api_key = user_api_key if user_api_key else config.GEMINI_API_KEY
+
+        # Drop cached model clients when a typed-in key is replaced. The client registry is
+        # shared by every session in the process, so keys from the configured pool are kept:
+        # other sessions are still using them.
+        previous_api_key = st.session_state.get('active_api_key')
+        if previous_api_key and previous_api_key != active_api_key and previous_api_key not in config.GEMINI_API_KEYS:
+            invalidate_models(previous_api_key)
+        st.session_state['active_api_key'] = active_api_key
         
         if active_api_key:
             st.success("✅ Gemini API 연결됨")
+            if not user_api_key and len(config.GEMINI_API_KEYS) > 1:
+                st.caption(f"🔑 API 키 {len(config.GEMINI_API_KEYS)}개를 번갈아 사용합니다. (한 키가 한도에 걸리면 자동 전환)")
         else:
             st.error("❌ API Key 필요")
             st.info("비어있을 시 .env 또는 Secrets의 키를 사용합니다.")
@@ -147,49 +197,50 @@ def main():
             active_model = st.text_input("모델 이름을 직접 입력하세요:", value="gemini-3-flash", help="AI Studio에 표시된 정확한 모델명을 입력하세요.")
         else:
             active_model = selected_option
+
+        # Local quota left for the selected model (persisted across restarts)
+        if active_api_key:
+            quota = RATE_LIMITER.remaining(active_api_key, active_model)
+            st.caption(f"📊 남은 한도 ({active_model}): 오늘 {quota['rpd']}회 · 이번 분 {quota['rpm']}회 / {quota['tpm']:,} 토큰")
+
+        # Shared model health table (circuit breaker state)
+        model_states = HEALTH.snapshot(active_api_key)
+        if model_states:
+            with st.expander("🩺 모델 상태"):
+                state_labels = {"healthy": "🟢 정상", "cooldown": "🟡 대기", "unavailable": "🔴 사용 불가"}
+                for name, info in model_states.items():
+                    detail = state_labels[info['state']]
+                    if info['state'] == "cooldown":
+                        detail += f" ({info['retry_in']}초 후 재시도)"
+                    if info['latency'] is not None:
+                        detail += f" · 평균 {info['latency']:.1f}초"
+                    st.caption(f"**{name}**: {detail}")
+
+        # Local response cache (identical prompts are served without a network call)
+        use_cache = st.checkbox("🗄️ 응답 캐시 사용", value=True, help="같은 주제·서식·모델로 다시 요청하면 저장된 결과를 재사용합니다. 새로운 결과가 필요하면 해제하세요.")
+        cache_stats = RESPONSE_CACHE.stats()
+        st.caption(f"캐시 적중 {cache_stats['hits']}회 / 미스 {cache_stats['misses']}회 · 저장 {cache_stats['entries']}건 ({cache_stats['bytes'] / 1024:.0f} KB)")
+        if st.button("🧹 캐시 비우기", use_container_width=True):
+            RESPONSE_CACHE.clear()
+            st.rerun()
+        auto_refine = st.checkbox("✨ 생성 직후 자동 검증·교정", value=False, help="글 생성이 끝나면 최신 정보 검증과 맞춤법 교정을 한 번의 AI 호출로 바로 적용합니다.")
+        refine_by_section = st.checkbox("🧩 섹션 단위로 다듬기 (변경된 문장만 반영)", value=False, help="HTML 태그를 제외한 문장만 소제목 단위로 나누어 병렬로 다듬고, 바뀐 문장만 원본에 반영합니다. 토큰 사용량과 대기 시간이 줄고 서식이 깨지지 않습니다. 새 문단 추가가 필요하면 해제하세요.")
+        use_streaming = st.checkbox("⚡ 실시간 미리보기 (스트리밍)", value=True, help="본문이 생성되는 동안 작성 중인 내용을 바로 보여줍니다.")
+        use_context_cache = st.checkbox("🧠 서식 컨텍스트 캐시 (Gemini)", value=False, help="서식과 작성 규칙을 Gemini 서버에 1시간 동안 캐시해 두고, 요청마다 주제만 보냅니다. 같은 서식으로 여러 글을 만들 때(특히 일괄 생성) 입력 토큰과 대기 시간이 줄어듭니다. 캐시를 지원하지 않는 모델이나 짧은 서식은 자동으로 일반 요청으로 처리됩니다.")
+        use_background_job = st.checkbox("🧵 백그라운드 작업으로 생성", value=False, help="서버의 작업 대기열에서 글을 생성합니다. 페이지를 새로고침하거나 다른 버튼을 눌러도 작업이 이어지고, 끝나면 결과를 불러옵니다. (실시간 미리보기는 사용되지 않습니다)")
         
         st.divider()
         st.header("📝 서식 선택")
         
-        # Cloud Sync Initialization
-        from firebase_sync import FirebaseSync
-        fb_sync = FirebaseSync()
-        if fb_sync.db:
+        timer.mark("사이드바")
+        # Cloud sync + local store are created once per process (bootstrap)
+        template_store = get_template_store()
+        if template_store.remote is not None:
             st.sidebar.success("📊 Firebase 클라우드 동기화 활성")
 
-        # Load custom templates (Local + Cloud Sync)
-        CUSTOM_TEMPLATES_FILE = "custom_templates.json"
-        
-        def load_custom_templates():
-            # 1. Start with local templates (로컬이 기준)
-            local_templates = {}
-            if os.path.exists(CUSTOM_TEMPLATES_FILE):
-                with open(CUSTOM_TEMPLATES_FILE, "r", encoding="utf-8") as f:
-                    try: local_templates = json.load(f)
-                    except: local_templates = {}
-            
-            # 2. Sync with Firebase (클라우드에만 있는 서식을 로컬에 추가, 로컬 서식은 덮어쓰지 않음)
-            cloud_templates = fb_sync.fetch_templates()
-            if cloud_templates:
-                for name, prompt in cloud_templates.items():
-                    if name not in local_templates:  # 로컬에 없는 것만 추가
-                        local_templates[name] = prompt
-            
-            return local_templates
-
-        def save_custom_templates(templates_dict):
-            # 1. Save locally
-            with open(CUSTOM_TEMPLATES_FILE, "w", encoding="utf-8") as f:
-                json.dump(templates_dict, f, ensure_ascii=False, indent=4)
-            
-            # 2. Save to Firebase
-            fb_sync.save_templates(templates_dict)
-
-        custom_templates = load_custom_templates()
-        
-        # Merge built-in and custom templates
-        builtin_names = ("수익형 HTML 템플릿 (코드 복붙용)", "수익형 블로그 규칙 (가이드라인)")
-        all_template_names = builtin_names + tuple(custom_templates.keys())
+        # Load custom templates (Local + Cloud Sync), memoized per session until they change
+        custom_templates, all_template_names = load_custom_templates()
+        timer.mark("서식")
         
         template_choice = st.selectbox(
             "사용할 서식을 선택하세요:",
@@ -208,8 +259,7 @@ def main():
                     if "{topic}" not in new_prompt:
                         st.error("{topic} 키워드가 프롬프트에 포함되어야 합니다.")
                     else:
-                        custom_templates[new_title] = new_prompt
-                        save_custom_templates(custom_templates)
+                        template_store.set(new_title, new_prompt)
                         st.success(f"'{new_title}' 서식이 저장되었습니다.")
                         st.rerun()
                 else:
@@ -220,8 +270,7 @@ def main():
                 del_title = st.selectbox("삭제할 서식 선택", tuple(custom_templates.keys()))
                 if st.button("🗑️ 서식 삭제", use_container_width=True):
                     if del_title in custom_templates:
-                        del custom_templates[del_title]
-                        save_custom_templates(custom_templates)
+                        template_store.delete(del_title)
                         st.success(f"'{del_title}' 서식이 삭제되었습니다.")
                         st.rerun()
 
@@ -262,6 +311,8 @@ def main():
         
         st.divider()
         st.write("💡 **팁**: 글 생성 후에 상단 버튼으로 내용을 한층 더 다듬을 수 있습니다.")
+        timer.mark("사이드바")
+        timer.render()
 
     # Template Editor
     with st.expander("🛠️ 서식(프롬프트) 직접 수정하기", expanded=False):
@@ -271,8 +322,7 @@ def main():
         if template_choice in custom_templates:
             if st.button("💾 이 서식을 저장하기", use_container_width=True):
                 # Update existing custom template
-                custom_templates[template_choice] = user_template
-                save_custom_templates(custom_templates)
+                template_store.set(template_choice, user_template)
                 st.success(f"'{template_choice}' 서식이 업데이트되었습니다.")
                 st.rerun()
         else:
@@ -284,8 +334,7 @@ def main():
                     if "{topic}" not in user_template:
                         st.error("{topic} 키워드가 프롬프트에 포함되어야 합니다.")
                     else:
-                        custom_templates[new_save_name] = user_template
-                        save_custom_templates(custom_templates)
+                        template_store.set(new_save_name, user_template)
                         st.success(f"'{new_save_name}' 서식이 저장되었습니다.")
                         st.rerun()
                 else:
@@ -306,11 +355,29 @@ def main():
         st.session_state['generated'] = False
         st.session_state['blog_data'] = None
         st.session_state['image_path'] = None
+        st.session_state['thumb_seed'] = 0
+        st.session_state['thumb_variants'] = None
         st.session_state['fact_checked'] = False
         st.session_state['spell_checked'] = False
 
+        if use_background_job:
+            # Queue the job; the page polls it below and survives reruns/reloads via the URL
+            job_id = get_job_queue().submit("blog_post", {
+                "topic": topic,
+                "template": user_template,
+                "model": active_model,
+                "use_cache": use_cache,
+                "auto_refine": auto_refine,
+                "refine_by_section": refine_by_section,
+                "use_context_cache": use_context_cache,
+            }, secrets={"api_key": active_api_key})
+            st.session_state['job_id'] = job_id
+            st.query_params["job"] = job_id
+            st.rerun()
+
         # Run Generation
-        blog_data, image_path, error_message = generate_blog_post(topic, user_template, api_key=active_api_key, selected_model=active_model)
+        generate_fn = generate_blog_post_streaming if use_streaming else generate_blog_post
+        blog_data, image_path, error_message = generate_fn(topic, user_template, api_key=active_api_key, selected_model=active_model, use_cache=use_cache, use_context_cache=use_context_cache)
         
         if blog_data:
             if 'content' not in blog_data:
@@ -321,9 +388,102 @@ def main():
             st.session_state['image_path'] = image_path
             st.session_state['generated'] = True
             st.session_state['topic'] = topic
+
+            if auto_refine:
+                with st.spinner("✨ 최신 정보 검증 및 맞춤법 교정을 한 번에 적용 중입니다..."):
+                    content_gen = get_content_generator(active_api_key, active_model)
+                    new_content, error_msg = content_gen.refine(blog_data['content'], topic, use_cache=use_cache, by_section=refine_by_section)
+                if new_content:
+                    st.session_state['blog_data']['content'] = new_content
+                    st.session_state['fact_checked'] = True
+                    st.session_state['spell_checked'] = True
+                else:
+                    st.warning(f"자동 검증·교정에 실패했습니다. 아래 버튼으로 다시 시도해 주세요. 원인: {error_msg}")
         else:
             st.error(error_message)
 
+    # Attach to a background generation job (this session's, or one restored from the URL)
+    job_id = st.session_state.get('job_id') or st.query_params.get("job")
+    if job_id:
+        job = get_job_queue().get(job_id)
+        if job is None:
+            st.warning("생성 작업을 찾을 수 없습니다. (만료되었거나 삭제됨)")
+            st.session_state['job_id'] = None
+            st.query_params.pop("job", None)
+        elif job["status"] in ("queued", "running"):
+            if job["status"] == "queued":
+                ahead = get_job_queue().position(job_id)
+                st.info(f"⏳ '{job['payload']['topic']}' 작업 대기 중입니다. (앞에 {ahead}개)")
+            else:
+                st.info(f"🤖 '{job['payload']['topic']}' 글을 백그라운드에서 작성하고 있습니다... (시도 {job['attempts']}회차) 새로고침해도 작업은 계속됩니다.")
+            time.sleep(2)
+            st.rerun()
+        else:
+            st.session_state['job_id'] = None
+            st.query_params.pop("job", None)
+            if job["status"] == "done":
+                result = job["result"]
+                st.session_state['blog_data'] = result["blog_data"]
+                thumb_title = result["blog_data"].get('thumbnail_title', result["blog_data"].get('title', job["payload"]["topic"]))
+                # Re-renders from the title if the thumbnail was evicted from the cache meanwhile
+                st.session_state['image_path'] = ThumbnailHandle(
+                    result["thumbnail_key"], THUMBNAIL_CACHE,
+                    rerender=lambda title=thumb_title: ImageGenerator().get_thumbnail(title).data
+                ) if result.get("thumbnail_key") else None
+                st.session_state['generated'] = True
+                st.session_state['topic'] = job["payload"]["topic"]
+                st.session_state['thumb_seed'] = 0
+                st.session_state['thumb_variants'] = None
+                st.session_state['fact_checked'] = False
+                st.session_state['spell_checked'] = False
+            else:
+                st.error(f"글 생성에 실패했습니다.\n\n**상세 원인:** {job['error']}")
+
+    # Batch Generation
+    with st.expander("📦 여러 주제 한 번에 생성하기 (일괄 생성)", expanded=False):
+        batch_text = st.text_area("주제 목록 (한 줄에 하나씩)", height=150, placeholder="예:\n다이어트 식단 가이드\n2026년 해외여행 추천지")
+        batch_csv = st.file_uploader("또는 CSV 파일 업로드 (첫 번째 열 = 주제)", type=["csv"])
+        batch_workers = st.slider("동시 실행 개수", min_value=1, max_value=8, value=3, help="무료 API 키는 분당 요청 수 제한이 있으니 너무 높게 설정하지 마세요.")
+
+        if st.button("📦 일괄 생성 시작", use_container_width=True):
+            batch_topics = parse_topics(batch_text, batch_csv.getvalue() if batch_csv else None)
+            if not batch_topics:
+                st.warning("주제를 한 개 이상 입력해주세요.")
+            elif not active_api_key:
+                st.error("API Key 설정이 필요합니다.")
+            else:
+                progress_bar = st.progress(0.0, text=f"0 / {len(batch_topics)} 완료")
+                status_box = st.empty()
+                status_lines = []
+
+                def on_batch_progress(done, total, result):
+                    progress_bar.progress(done / total, text=f"{done} / {total} 완료")
+                    mark = "✅" if result.get("blog_data") else "❌"
+                    status_lines.append(f"{mark} {result['topic']} ({result['elapsed']:.1f}초)")
+                    status_box.markdown("\n".join(f"- {line}" for line in status_lines))
+
+                started = time.time()
+                batch_gen = BatchGenerator(api_key=active_api_key, selected_model=active_model, max_workers=batch_workers, use_cache=use_cache, auto_refine=auto_refine, refine_by_section=refine_by_section, use_context_cache=use_context_cache)
+                batch_results = batch_gen.run(batch_topics, user_template, on_progress=on_batch_progress)
+                st.session_state['batch_results'] = batch_results
+                st.session_state['batch_bundle'] = build_bundle(batch_results)
+                st.session_state['batch_elapsed'] = time.time() - started
+
+        if st.session_state.get('batch_results'):
+            batch_results = st.session_state['batch_results']
+            ok_count = sum(1 for r in batch_results if r and r.get("blog_data"))
+            st.success(f"{ok_count} / {len(batch_results)}개 생성 완료 (총 {st.session_state.get('batch_elapsed', 0):.1f}초)")
+            for r in batch_results:
+                if r and not r.get("blog_data"):
+                    st.error(f"'{r['topic']}' 실패: {r.get('error')}")
+            st.download_button(
+                label="💾 결과 묶음 다운로드 (ZIP)",
+                data=st.session_state['batch_bundle'],
+                file_name=f"batch_posts_{int(time.time())}.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+
     # Display Results
     if st.session_state.get('generated'):
         st.divider()
@@ -332,12 +492,14 @@ def main():
         blog_data = st.session_state['blog_data']
         image_path = st.session_state['image_path']
         current_topic = st.session_state.get('topic', topic)
+        if "truncated" in blog_data.get('repairs', []):
+            st.warning("⚠️ AI 응답 끝부분이 잘려 복구된 결과입니다. 본문이나 태그 일부가 빠졌을 수 있으니 확인하거나 다시 생성해 주세요.")
 
         # Action Area
         act_col1, act_col2 = st.columns([2, 1])
         
         with act_col1:
-            b_col1, b_col2 = st.columns(2)
+            b_col1, b_col2, b_col3 = st.columns(3)
             with b_col1:
                 btn_label = "🔍 최신 정보 검증 및 보완"
                 if st.session_state['fact_checked']:
@@ -345,8 +507,8 @@ def main():
                 
                 if st.button(btn_label, key="fact_check_btn", use_container_width=True):
                     with st.spinner("최신 정보를 확인하고 내용을 보강 중입니다..."):
-                        content_gen = ContentGenerator(api_key=active_api_key, selected_model=active_model)
-                        new_content, error_msg = content_gen.verify_and_rewrite(blog_data['content'], current_topic)
+                        content_gen = get_content_generator(active_api_key, active_model)
+                        new_content, error_msg = content_gen.verify_and_rewrite(blog_data['content'], current_topic, use_cache=use_cache, by_section=refine_by_section)
                         if new_content:
                             st.session_state['blog_data']['content'] = new_content
                             st.session_state['fact_checked'] = True
@@ -362,8 +524,8 @@ def main():
                     
                 if st.button(btn_label, key="spell_check_btn", use_container_width=True):
                     with st.spinner("맞춤법 및 문법을 교정 중입니다..."):
-                        content_gen = ContentGenerator(api_key=active_api_key, selected_model=active_model)
-                        new_content, error_msg = content_gen.spell_check_and_refine(blog_data['content'])
+                        content_gen = get_content_generator(active_api_key, active_model)
+                        new_content, error_msg = content_gen.spell_check_and_refine(blog_data['content'], use_cache=use_cache, by_section=refine_by_section)
                         if new_content:
                             st.session_state['blog_data']['content'] = new_content
                             st.session_state['spell_checked'] = True
@@ -372,6 +534,24 @@ def main():
                         else:
                             st.error(f"맞춤법 교정에 실패했습니다. 원인: {error_msg}")
 
+            with b_col3:
+                btn_label = "✨ 검증 + 교정 한 번에"
+                if st.session_state['fact_checked'] and st.session_state['spell_checked']:
+                    btn_label += " (✅ 완료)"
+
+                if st.button(btn_label, key="refine_all_btn", use_container_width=True, help="두 작업을 한 번의 AI 호출로 처리합니다."):
+                    with st.spinner("최신 정보 검증과 맞춤법 교정을 한 번에 진행 중입니다..."):
+                        content_gen = get_content_generator(active_api_key, active_model)
+                        new_content, error_msg = content_gen.refine(blog_data['content'], current_topic, use_cache=use_cache, by_section=refine_by_section)
+                        if new_content:
+                            st.session_state['blog_data']['content'] = new_content
+                            st.session_state['fact_checked'] = True
+                            st.session_state['spell_checked'] = True
+                            st.success("검증 및 교정이 완료되었습니다!")
+                            st.rerun()
+                        else:
+                            st.error(f"검증 및 교정에 실패했습니다. 원인: {error_msg}")
+
         with act_col2:
             content_to_count = blog_data.get('content', '')
             counts = get_word_count_details(content_to_count)
@@ -383,6 +563,15 @@ def main():
                 <p style="margin: 0; font-size: 0.75rem; color: #adb5bd;">(한글: {counts['korean_only']}자 / 전체: {counts['total_with_spaces']}자)</p>
             </div>
             """, unsafe_allow_html=True)
+            length_ok, length_msg = check_length(content_to_count)
+            if not length_ok:
+                st.warning(length_msg)
+            analysis = analyze_html(content_to_count)
+            with st.expander("📊 본문 구조"):
+                st.caption(f"링크 {analysis['links']}개 (외부 {analysis['external_links']}) · 이미지 {analysis['images']}개 · 광고 슬롯 {analysis['ad_slots']}개 · FAQ 스키마 {'있음' if analysis['faq_schema'] else '없음'}")
+                for section in analysis['sections']:
+                    prefix = "└ " * max(0, section['level'] - 2)
+                    st.text(f"{prefix}{section['heading'] or '(도입부)'} — {section['korean']}자")
 
         st.divider()
         col1, col2 = st.columns([1, 1])
@@ -390,8 +579,18 @@ def main():
         with col1:
             st.subheader("1. 썸네일 이미지")
             if image_path:
-                # Use native Streamlit image for better reliability
-                st.image(image_path, use_container_width=True)
+                is_thumbnail = isinstance(image_path, ThumbnailHandle)
+                # Stock photos are served from the local stock cache (falls back to the remote URL)
+                # Bytes are memoized per URL in the session, so reruns don't touch the disk or network
+                stock_bytes = None
+                if not is_thumbnail:
+                    memo = st.session_state.get('_stock_bytes')
+                    if not memo or memo[0] != image_path:
+                        memo = (image_path, STOCK_CACHE.fetch(image_path))
+                        st.session_state['_stock_bytes'] = memo
+                    stock_bytes = memo[1]
+                # Use native Streamlit image for better reliability (cached JPEG bytes, no base64 round trip)
+                st.image(image_path.data if is_thumbnail else (stock_bytes or image_path), use_container_width=True)
                 
                 # Keyword control for Stock Photos
                 current_kw = blog_data.get('image_keywords', 'nature')
@@ -403,55 +602,45 @@ def main():
                 # Image Action Buttons
                 c1, c2 = st.columns(2)
                 with c1:
-                    is_data_url = image_path.startswith("data:image")
-                    
-                    if is_data_url:
-                        # For self-generated JPGs or embedded images
+                    if is_thumbnail:
+                        # For self-generated JPGs: hand the cached bytes straight to the download button
                         try:
-                            import base64
-                            parts = image_path.split(",", 1)
-                            if len(parts) == 2:
-                                data = base64.b64decode(parts[1])
-                                st.download_button(
-                                    label="💾 JPG 이미지 컴퓨터에 저장",
-                                    data=data,
-                                    file_name=f"thumbnail_{int(time.time())}.jpg",
-                                    mime="image/jpeg",
-                                    use_container_width=True
-                                )
-                            else:
-                                st.error("이미지 데이터를 해석할 수 없습니다.")
+                            st.download_button(
+                                label="💾 JPG 이미지 컴퓨터에 저장",
+                                data=image_path.data,
+                                file_name=f"thumbnail_{int(time.time())}.jpg",
+                                mime="image/jpeg",
+                                use_container_width=True
+                            )
                         except Exception as e:
                             st.warning(f"저장 시도 중 오류: {e}")
-                            st.link_button("🔗 브라우저에서 열기", image_path, use_container_width=True)
                     else:
-                        # For stock photos (Unsplash/External JPG) - Be extremely robust
-                        try:
-                            headers = {
-                                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                            }
-                            # allow_redirects=True is default but let's be explicit
-                            response = requests.get(image_path, headers=headers, timeout=15, allow_redirects=True)
-                            if response.status_code == 200:
-                                st.download_button(
-                                    label="💾 JPG 이미지 컴퓨터에 저장",
-                                    data=response.content,
-                                    file_name=f"stock_image_{int(time.time())}.jpg",
-                                    mime="image/jpeg",
-                                    use_container_width=True
-                                )
-                            else:
-                                st.error(f"이미지 서버 응답 오류 ({response.status_code})")
-                                st.link_button("🔗 원본 링크로 열기 (브라우저 차단 가능)", image_path, use_container_width=True)
-                        except Exception as e:
-                            st.error(f"다운로드 연결 실패: {e}")
+                        # For stock photos (Unsplash/External JPG) - served from the local stock cache
+                        if stock_bytes:
+                            st.download_button(
+                                label="💾 JPG 이미지 컴퓨터에 저장",
+                                data=stock_bytes,
+                                file_name=f"stock_image_{int(time.time())}.jpg",
+                                mime="image/jpeg",
+                                use_container_width=True
+                            )
+                        else:
+                            st.error("이미지를 내려받지 못했습니다. (서버 응답 오류 또는 연결 실패)")
                             st.link_button("🔗 원본 링크로 열기 (브라우저 차단 가능)", image_path, use_container_width=True)
                 
                 with c2:
                     if st.button("🔄 새로운 색상/배경으로 변경", type="primary", use_container_width=True):
                         image_gen = ImageGenerator()
                         display_title = blog_data.get('thumbnail_title', blog_data['title'])
-                        st.session_state['image_path'] = image_gen.get_jpg_thumbnail(display_title)
+                        # A new seed picks a different palette/badge on purpose
+                        st.session_state['thumb_seed'] = st.session_state.get('thumb_seed', 0) + 1
+                        st.session_state['image_path'] = image_gen.get_thumbnail(display_title, seed=st.session_state['thumb_seed'])
+                        st.rerun()
+                    if st.button("🎨 모든 색상·문구 조합 한 번에 보기", use_container_width=True, help="모든 배경색과 배지 문구 조합을 동시에 만들어 한 화면에서 고를 수 있습니다."):
+                        with st.spinner("썸네일 조합을 한꺼번에 만드는 중입니다..."):
+                            image_gen = ImageGenerator()
+                            display_title = blog_data.get('thumbnail_title', blog_data['title'])
+                            st.session_state['thumb_variants'] = image_gen.render_variants(display_title)
                         st.rerun()
 
                 # Robust Fallback Options
@@ -463,7 +652,7 @@ def main():
                     if st.button("✅ 텍스트 썸네일 (기본값)", use_container_width=True):
                         image_gen = ImageGenerator()
                         display_title = blog_data.get('thumbnail_title', blog_data['title'])
-                        st.session_state['image_path'] = image_gen.get_jpg_thumbnail(display_title)
+                        st.session_state['image_path'] = image_gen.get_thumbnail(display_title, seed=st.session_state.get('thumb_seed', 0))
                         st.rerun()
                 
                 with f_col2:
@@ -491,7 +680,7 @@ def main():
                 st.warning("이미지 정보가 없습니다.")
                 if st.button("🖼️ 이미지 다시 생성", use_container_width=True):
                     image_gen = ImageGenerator()
-                    st.session_state['image_path'] = image_gen.get_jpg_thumbnail(st.session_state.get('topic', 'Blog'))
+                    st.session_state['image_path'] = image_gen.get_thumbnail(st.session_state.get('topic', 'Blog'), seed=st.session_state.get('thumb_seed', 0))
                     st.session_state['generated'] = True
                     st.rerun()
 
@@ -503,6 +692,25 @@ def main():
             
             st.info("💡 제목과 태그를 수정한 뒤 HTML 코드를 복사하세요.")
 
+        # Thumbnail variant grid (one column per palette, one row per badge)
+        thumb_variants = st.session_state.get('thumb_variants')
+        if thumb_variants:
+            st.divider()
+            g_head, g_close = st.columns([4, 1])
+            g_head.subheader("🎨 썸네일 조합 선택")
+            if g_close.button("닫기", use_container_width=True):
+                st.session_state['thumb_variants'] = None
+                st.rerun()
+            palette_count = len(dict.fromkeys(bg for bg, _, _ in thumb_variants))
+            grid_cols = st.columns(palette_count)
+            for i, (bg_hex, badge_text, handle) in enumerate(thumb_variants):
+                with grid_cols[i // (len(thumb_variants) // palette_count)]:
+                    st.image(handle.data, caption=badge_text, use_container_width=True)
+                    if st.button("이걸로 선택", key=f"pick_variant_{i}", use_container_width=True):
+                        st.session_state['image_path'] = handle
+                        st.session_state['thumb_variants'] = None
+                        st.rerun()
+
         st.divider()
         
         tab1, tab2 = st.tabs(["📝 본문 HTML 코드", "👀 포스팅 미리보기"])
@@ -544,4 +752,7 @@ def main():
             components.html(styled_html, height=800, scrolling=True)
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        finish_rerun()
@@ -0,0 +1,183 @@
+import concurrent.futures
+import csv
+import io
+import json
+import re
+import time
+import zipfile
+
+import html_analytics
+from content_generator import ContentGenerator
+from image_generator import ImageGenerator
+
+
+def parse_topics(text="", csv_bytes=None):
+    """
+    Builds a deduplicated topic list from pasted lines and/or an uploaded CSV.
+    Only the first column of each CSV row is used; a 'topic'/'주제' header row is skipped.
+    """
+    topics = []
+
+    # 1. Pasted text (one topic per line)
+    for line in (text or "").splitlines():
+        if line.strip():
+            topics.append(line.strip())
+
+    # 2. Uploaded CSV
+    if csv_bytes:
+        decoded = csv_bytes.decode("utf-8-sig", errors="ignore")
+        for row in csv.reader(io.StringIO(decoded)):
+            if not row or not row[0].strip():
+                continue
+            cell = row[0].strip()
+            if cell.lower() in ("topic", "topics", "주제"):
+                continue
+            topics.append(cell)
+
+    return list(dict.fromkeys(topics))  # Deduplicate, keep order
+
+
+class BatchGenerator:
+    def __init__(self, api_key=None, selected_model=None, max_workers=3, with_thumbnail=True, use_cache=True, auto_refine=False, refine_by_section=False, use_context_cache=False):
+        # One generator is shared by every worker; it holds no per-request state.
+        self.content_gen = ContentGenerator(api_key=api_key, selected_model=selected_model)
+        self.image_gen = ImageGenerator() if with_thumbnail else None
+        self.max_workers = max(1, int(max_workers))
+        self.use_cache = use_cache
+        self.auto_refine = auto_refine
+        self.refine_by_section = refine_by_section
+        # Every topic shares the same template, so its prefix is cached once server-side
+        self.use_context_cache = use_context_cache
+
+    def _run_one(self, topic, prompt_template):
+        """
+        Generates a single post (content + text thumbnail). Runs inside a worker thread.
+        """
+        started = time.time()
+        blog_data, error = self.content_gen.generate_blog_post(topic, prompt_template, use_cache=self.use_cache, use_context_cache=self.use_context_cache)
+
+        if blog_data and blog_data.get('content') and self.auto_refine:
+            # Fused fact check + spell check (one extra round trip)
+            refined, refine_error = self.content_gen.refine(
+                blog_data['content'], topic, use_cache=self.use_cache, by_section=self.refine_by_section
+            )
+            if refined:
+                blog_data['content'] = refined
+            else:
+                print(f"Refinement failed for '{topic}': {refine_error}")
+
+        image_path = None
+        if blog_data and self.image_gen:
+            try:
+                display_title = blog_data.get('thumbnail_title', blog_data.get('title', topic))
+                image_path = self.image_gen.get_thumbnail(display_title)
+            except Exception as e:
+                print(f"Thumbnail failed for '{topic}': {e}")
+
+        if blog_data and 'content' not in blog_data:
+            blog_data, error = None, "AI 응답 형식이 올바르지 않습니다. (본문 내용 누락)"
+
+        return {
+            "topic": topic,
+            "blog_data": blog_data,
+            "image_path": image_path,
+            "error": error,
+            "elapsed": time.time() - started,
+        }
+
+    def run(self, topics, prompt_template, on_progress=None):
+        """
+        Runs every topic through a bounded thread pool.
+        on_progress(done, total, result) is called from the calling thread as each topic finishes,
+        so it is safe to update Streamlit widgets from it.
+        Returns results in the same order as `topics`.
+        """
+        results = [None] * len(topics)
+        if not topics:
+            return results
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(topics))) as pool:
+            futures = {pool.submit(self._run_one, topic, prompt_template): i for i, topic in enumerate(topics)}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = {"topic": topics[i], "blog_data": None, "image_path": None, "error": str(e), "elapsed": 0.0}
+                if on_progress:
+                    on_progress(done, len(topics), results[i])
+
+        return results
+
+
+def run_post_job(payload, secrets):
+    """
+    Job-queue handler for a single post: payload = {topic, template, model, use_cache,
+    auto_refine, refine_by_section, use_context_cache}, secrets = {api_key}.
+    Returns (result, error); the thumbnail is referenced by its cache key so the result stays JSON.
+    """
+    generator = BatchGenerator(
+        api_key=secrets.get("api_key"),
+        selected_model=payload.get("model"),
+        use_cache=payload.get("use_cache", True),
+        auto_refine=payload.get("auto_refine", False),
+        refine_by_section=payload.get("refine_by_section", False),
+        use_context_cache=payload.get("use_context_cache", False),
+    )
+    result = generator._run_one(payload["topic"], payload["template"])
+    if not result["blog_data"]:
+        return None, result["error"] or "글 생성에 실패했습니다."
+
+    thumbnail = result["image_path"]
+    return {
+        "blog_data": result["blog_data"],
+        "thumbnail_key": thumbnail.key if thumbnail is not None else None,
+        "elapsed": result["elapsed"],
+    }, None
+
+
+def _slugify(text, max_len=40):
+    slug = re.sub(r'[\\/:*?"<>|\s]+', "_", text).strip("_")
+    return slug[:max_len] or "post"
+
+
+def build_bundle(results):
+    """
+    Packs batch results into a ZIP: one folder per post (post.html, meta.json, thumbnail.jpg)
+    plus an index.csv summary. Returns the ZIP as bytes.
+    """
+    buffer = io.BytesIO()
+    index_rows = [["no", "topic", "status", "title", "folder", "error"]]
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for no, result in enumerate(results, 1):
+            if not result:
+                continue
+            blog_data = result.get("blog_data")
+            if not blog_data:
+                index_rows.append([no, result["topic"], "failed", "", "", result.get("error") or ""])
+                continue
+
+            folder = f"{no:02d}_{_slugify(result['topic'])}"
+            zf.writestr(f"{folder}/post.html", blog_data.get("content", ""))
+            meta = {k: v for k, v in blog_data.items() if k != "content"}
+            meta["topic"] = result["topic"]
+            analysis = html_analytics.analyze_html(blog_data.get("content", ""))
+            meta["length"] = {
+                "korean_only": analysis["korean_only"],
+                "total_no_spaces": analysis["total_no_spaces"],
+                "ok": html_analytics.check_length(blog_data.get("content", ""))[0],
+            }
+            zf.writestr(f"{folder}/meta.json", json.dumps(meta, ensure_ascii=False, indent=2))
+
+            thumbnail = result.get("image_path")
+            if thumbnail is not None:
+                zf.writestr(f"{folder}/thumbnail.jpg", thumbnail.data)
+
+            index_rows.append([no, result["topic"], "ok", blog_data.get("title", ""), folder, ""])
+
+        csv_buffer = io.StringIO()
+        csv.writer(csv_buffer).writerows(index_rows)
+        zf.writestr("index.csv", "\ufeff" + csv_buffer.getvalue())  # BOM for Excel (Korean)
+
+    return buffer.getvalue()
@@ -0,0 +1,140 @@
+import time
+
+import streamlit as st
+
+import font_index
+import template_store
+from batch_generator import run_post_job
+from content_generator import ContentGenerator
+from firebase_sync import FirebaseSync
+from job_queue import JobQueue
+
+BUILTIN_TEMPLATE_NAMES = ("수익형 HTML 템플릿 (코드 복붙용)", "수익형 블로그 규칙 (가이드라인)")
+TIMING_HISTORY = 20
+
+
+# -- once per process ----------------------------------------------------------
+
+@st.cache_resource(show_spinner=False)
+def get_content_generator(api_key, selected_model):
+    """
+    Process-wide ContentGenerator per (API key, model), reused across reruns and sessions.
+    Model clients themselves are shared through the registry in content_generator.
+    """
+    return ContentGenerator(api_key=api_key, selected_model=selected_model)
+
+
+@st.cache_resource(show_spinner="🔤 글꼴을 준비하는 중입니다...")
+def warm_up_fonts():
+    """
+    One-time font setup per process (download + persistent font index).
+    """
+    return font_index.warm_up()
+
+
+@st.cache_resource(show_spinner=False)
+def get_firebase_sync():
+    """One Firestore client per process instead of one per rerun."""
+    return FirebaseSync()
+
+
+@st.cache_resource(show_spinner=False)
+def get_template_store():
+    """
+    Process-wide local template store wired to the cloud: write-behind sync and
+    the snapshot listener are set up here, once.
+    """
+    fb_sync = get_firebase_sync()
+    store = template_store.get_store(remote=fb_sync if fb_sync.db else None)
+    if fb_sync.db:
+        # One background listener per server keeps the cloud templates current for every session
+        fb_sync.start_listener(mirror=store)
+    return store
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    """Process-wide generation queue; its workers are shared by every session."""
+    queue = JobQueue()
+    queue.register("blog_post", run_post_job)
+    queue.start()
+    return queue
+
+
+# -- once per session (memoized until the data changes) ----------------------------
+
+def load_custom_templates():
+    """
+    Returns (custom_templates, all_template_names).
+    Local templates win; cloud-only templates are added. The merged result is memoized
+    in the session and rebuilt only when the local file or the cloud cache changed.
+    """
+    fb_sync = get_firebase_sync()
+    store = get_template_store()
+    cloud_templates = fb_sync.fetch_templates()  # In-process cache hit on most reruns
+    deleting = store.pending_deletes()  # 클라우드 삭제가 아직 반영되지 않은 서식
+    memo_key = (store.revision, fb_sync.revision(), frozenset(deleting))
+
+    memo = st.session_state.get('_templates_memo')
+    if memo and memo[0] == memo_key:
+        return memo[1], memo[2]
+
+    # 1. Start with local templates (로컬이 기준)
+    custom_templates = store.load()
+    # 2. Sync with Firebase (클라우드에만 있는 서식을 로컬에 추가, 로컬 서식은 덮어쓰지 않음)
+    if cloud_templates:
+        for name, prompt in cloud_templates.items():
+            if name not in custom_templates and name not in deleting:  # 로컬에 없는 것만 추가
+                custom_templates[name] = prompt
+
+    names = BUILTIN_TEMPLATE_NAMES + tuple(custom_templates.keys())
+    st.session_state['_templates_memo'] = (memo_key, custom_templates, names)
+    return custom_templates, names
+
+
+# -- per-rerun instrumentation ---------------------------------------------------
+
+class RerunTimer:
+    """
+    Wall-clock timing of one script run, split into named stages:
+    mark(name) records the time since the previous mark.
+    Finished runs are kept in st.session_state['_rerun_timings'] (last TIMING_HISTORY).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.stages = {}
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self):
+        history = st.session_state.setdefault('_rerun_timings', [])
+        history.append({"total": time.perf_counter() - self.started, "stages": dict(self.stages)})
+        del history[:-TIMING_HISTORY]
+
+    def render(self):
+        """Caption with the previous run's total, the rolling average and this run's stages so far."""
+        history = st.session_state.get('_rerun_timings', [])
+        parts = [f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.stages.items()]
+        if history:
+            last = history[-1]["total"] * 1000
+            average = sum(h["total"] for h in history) / len(history) * 1000
+            st.caption(f"⏱️ 직전 실행 {last:.0f}ms · 평균 {average:.0f}ms ({len(history)}회) | " + ", ".join(parts))
+        else:
+            st.caption("⏱️ " + ", ".join(parts))
+
+
+def start_rerun():
+    timer = RerunTimer()
+    st.session_state['_rerun_timer'] = timer
+    return timer
+
+
+def finish_rerun():
+    timer = st.session_state.get('_rerun_timer')
+    if timer is not None:
+        timer.finish()
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 from dotenv import load_dotenv
@@ -20,9 +21,49 @@ except Exception:
 if not GEMINI_API_KEY:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# 4. Optional key pool: several keys, comma-separated (GEMINI_API_KEYS), balanced per request.
+# GEMINI_API_KEY (if set) is always part of the pool.
+_pool_value = None
+try:
+    _pool_value = st.secrets.get("GEMINI_API_KEYS")
+except Exception:
+    pass
+if not _pool_value:
+    _pool_value = os.getenv("GEMINI_API_KEYS", "")
+if isinstance(_pool_value, str):
+    _pool_value = _pool_value.split(",")
+GEMINI_API_KEYS = list(dict.fromkeys(k.strip() for k in [GEMINI_API_KEY or ""] + list(_pool_value) if k and k.strip()))
+if not GEMINI_API_KEY and GEMINI_API_KEYS:
+    GEMINI_API_KEY = GEMINI_API_KEYS[0]
+
 # For debugging in console (optional, but helpful)
 # print(f"DEBUG: GEMINI_API_KEY detected: {bool(GEMINI_API_KEY)}")
 
+# 5. Local rate limits per model (free tier defaults). rpm = requests/minute,
+# tpm = tokens/minute, rpd = requests/day (the day resets at midnight Pacific time).
+DEFAULT_RATE_LIMIT = {"rpm": 10, "tpm": 250000, "rpd": 250}
+MODEL_RATE_LIMITS = {
+    "gemini-2.0-flash": {"rpm": 15, "tpm": 1000000, "rpd": 200},
+    "gemini-2.0-flash-lite": {"rpm": 30, "tpm": 1000000, "rpd": 200},
+    "gemini-1.5-flash": {"rpm": 15, "tpm": 250000, "rpd": 50},
+    "gemini-1.5-pro": {"rpm": 2, "tpm": 32000, "rpd": 50},
+    "gemini-2.5-flash": {"rpm": 10, "tpm": 250000, "rpd": 250},
+    "gemini-2.5-pro": {"rpm": 5, "tpm": 250000, "rpd": 100},
+}
+# Per-key overrides for keys on a different tier, keyed by rate_limiter.key_id(api_key)
+# (sha256 prefix, so raw keys never appear here). "*" applies to every model; only the
+# fields given replace the model limit, e.g. {"3f2a...": {"*": {"rpd": 1000}, "gemini-2.5-pro": {"rpm": 150}}}.
+# Set KEY_RATE_LIMITS in Streamlit secrets (table) or the environment (JSON).
+KEY_RATE_LIMITS = {}
+try:
+    KEY_RATE_LIMITS = dict(st.secrets.get("KEY_RATE_LIMITS") or {})
+except Exception:
+    pass
+if not KEY_RATE_LIMITS and os.getenv("KEY_RATE_LIMITS"):
+    KEY_RATE_LIMITS = json.loads(os.getenv("KEY_RATE_LIMITS"))
+# Longest a call waits for a free slot before trying the next model (seconds)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))
+
 def validate_config():
     if not GEMINI_API_KEY:
         print("Error: GEMINI_API_KEY is missing.")
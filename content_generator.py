@@ -1,16 +1,161 @@
 import google.generativeai as genai
+import google.ai.generativelanguage as glm
 import config
+import concurrent.futures
+from context_cache import CONTEXT_CACHE
+from html_sections import split_sections, MaskedSection
+from key_pool import KeyPool, get_client, drop_client
+from model_health import HEALTH
+from rate_limiter import RATE_LIMITER, estimate_tokens
+from response_cache import RESPONSE_CACHE
+from json_stream import IncrementalFieldExtractor
+from json_repair import parse_model_json
+from templates import compile_template
 import json
 import re
+import threading
 import time
 
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
+# Static part of every blog request, sent through the model's system-instruction slot
+# instead of being pasted into each prompt.
+BLOG_SYSTEM_INSTRUCTION = """당신은 티스토리 수익형 블로그 전문 필진입니다.
+본문 텍스트 내의 한글 글자 수(공백 제외)가 반드시 1,600자~2,000자 사이가 되도록 매우 길고 상세하게 작성하세요.
+문단마다 깊이 있는 정보를 제공하고, 이모지 사용을 금지하며 전문적인 해요체를 사용하세요.
+
+⚠️ [CRITICAL: OUTPUT FORMAT]
+반드시 아래의 JSON 형식을 엄격히 준수하여 응답하세요. 다른 텍스트 설명은 포함하지 마세요.
+{
+    "title": "SEO 최적화된 제목",
+    "thumbnail_title": "이미지에 들어갈 핵심 키워드 + ' >'",
+    "content": "HTML 형식의 본문 내용 (한글 1,600자 이상)",
+    "tags": ["태그1", "태그2", "태그3", "태그4", "태그5"],
+    "image_prompt": "이미지 생성을 위한 상세 영어 프롬프트",
+    "image_keywords": "이미지 테마 영문 키워드 2-3개"
+}"""
+
+_TAG_RE = re.compile(r'<[^>]*>', re.DOTALL)
+_RESIDUE_RE = re.compile(r'\s*[}\]]+\s*$')
+
+# Process-wide registry of GenerativeModel clients.
+# Shared by every ContentGenerator (Streamlit reruns, sessions and batch workers),
+# keyed by (api_key, model_name, safety settings, system instruction, cached content).
+_MODEL_REGISTRY = {}
+_REGISTRY_LOCK = threading.RLock()
+
+
+def get_model(api_key, model_name, safety_settings, system_instruction=None, cached_content=None):
+    """
+    Returns a cached GenerativeModel, building it on first use.
+    Each model is bound to its own key's client (no process-global genai.configure).
+    With cached_content (a context cache handle) the system instruction comes from the cache.
+    """
+    registry_key = (api_key, model_name, tuple(sorted((int(k), int(v)) for k, v in safety_settings.items())), system_instruction, cached_content)
+    with _REGISTRY_LOCK:
+        model = _MODEL_REGISTRY.get(registry_key)
+        if model is None:
+            if cached_content:
+                # A CachedContent proto (name + model) avoids the SDK's lookup through the global client
+                handle = glm.CachedContent(
+                    name=cached_content,
+                    model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+                )
+                model = genai.GenerativeModel.from_cached_content(handle, safety_settings=safety_settings)
+            else:
+                model = genai.GenerativeModel(model_name=model_name, safety_settings=safety_settings, system_instruction=system_instruction)
+            model._client = get_client(api_key)
+            _MODEL_REGISTRY[registry_key] = model
+        return model
+
+
+# Top-level fields that carry the body of a JSON response
+_BODY_KEYS = ("content", "segments")
+
+
+def _body_lost(data, repairs):
+    """
+    True when a repaired response lost part of its body: the output was cut inside the body
+    (the body is the last, cut-off field) or the body is missing. A cut after the body
+    (e.g. in "tags") or missing closing brackets only are not a loss.
+    """
+    if "truncated" not in repairs:
+        return False
+    if not isinstance(data, dict) or not any(key in data for key in _BODY_KEYS):
+        return True
+    return list(data)[-1] in _BODY_KEYS
+
+
+def _incomplete(repairs):
+    """Repaired from a cut-off response: usable, but not worth caching."""
+    return "truncated" in repairs or "missing_closer" in repairs
+
+
+def _usage_tokens(response):
+    """Total tokens billed for a response, or None when the SDK did not report it."""
+    try:
+        return response.usage_metadata.total_token_count
+    except AttributeError:
+        return None
+
+
+def invalidate_models(api_key=None):
+    """
+    Drops cached model clients. With api_key, only that key's entries are removed.
+    Call this when a key is replaced or revoked.
+    """
+    with _REGISTRY_LOCK:
+        for registry_key in list(_MODEL_REGISTRY):
+            if api_key is None or registry_key[0] == api_key:
+                del _MODEL_REGISTRY[registry_key]
+    drop_client(api_key)
+
+
+class RefinementStage:
+    """
+    One refinement pass over a generated HTML body.
+    `role` is used when the stage runs alone; `instructions` is the checklist that is
+    also used when several stages are fused into one model call. `{topic}` is substituted.
+    """
+    def __init__(self, name, title, role, heading, instructions):
+        self.name = name
+        self.title = title
+        self.role = role
+        self.heading = heading
+        self.instructions = instructions
+
+
+REFINEMENT_STAGES = {
+    "fact_check": RefinementStage(
+        name="fact_check",
+        title="최신 정보 검증 및 보완",
+        role="""당신은 전문 사실 확인 및 콘텐츠 편집가입니다.
+        다음 주제({topic})에 대해 작성된 블로그 본문(HTML 형식)을 검토해주세요.""",
+        heading="검토 지침",
+        instructions="""1. 정보의 최신성: 2026년 2월 현재 기준으로 정보가 정확하고 최신인지 확인하세요.
+        2. 내용 보완: 부족하거나 틀린 정보가 있다면 실제 팩트에 기반하여 자연스럽게 수정하거나 보완하세요.
+        3. 기존 스타일 유지: 제공된 HTML 구조와 스타일을 그대로 유지하면서 내용만 개선하세요.
+        4. 말투: 친절한 해요체 유지. 이모지 사용 금지.""",
+    ),
+    "spell_check": RefinementStage(
+        name="spell_check",
+        title="맞춤법 검사 및 교정",
+        role="""당신은 한국어 교열 전문가입니다.
+        다음 HTML 본문의 맞춤법, 띄어쓰기, 문법을 교정하고 문장을 더 매끄럽게 다듬어주세요.""",
+        heading="주의 사항",
+        instructions="""1. HTML 태그는 절대 건드리지 마세요. 태그 내부의 텍스트만 교정하세요.
+        2. 가급적 원래의 의미를 훼손하지 않으면서 자연스러운 문장으로 만드세요.
+        3. 이모지는 절대 사용하지 마세요.""",
+    ),
+}
+
+
 class ContentGenerator:
-    def __init__(self, api_key=None, selected_model=None):
-        # Use provided key or fallback to config
-        key = api_key if api_key else config.GEMINI_API_KEY
-        genai.configure(api_key=key)
+    def __init__(self, api_key=None, selected_model=None, context_cache=None):
+        # Requests go through the key pool. A key from the configured pool (or none)
+        # uses the whole pool; any other key (typed in by the user) is used on its own.
+        configured_keys = config.GEMINI_API_KEYS
+        self.key_pool = KeyPool(configured_keys if not api_key or api_key in configured_keys else [api_key])
         
         # Available models from verified list (Fallbacks)
         # Added futuristic models seen in user screenshot
@@ -35,94 +180,296 @@ class ContentGenerator:
             HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
         }
 
-        self.system_instruction = """
-        당신은 티스토리 수익형 블로그 전문 필진입니다.
-        본문 텍스트 내의 한글 글자 수(공백 제외)가 반드시 1,600자~2,000자 사이가 되도록 매우 길고 상세하게 작성하세요.
-        문단마다 깊이 있는 정보를 제공하고, 이모지 사용을 금지하며 전문적인 해요체를 사용하세요.
+        self.system_instruction = BLOG_SYSTEM_INSTRUCTION
+        # Server-side cache for the static prompt prefix (used when use_context_cache=True)
+        self.context_cache = context_cache if context_cache is not None else CONTEXT_CACHE
+
+    def _parse_response(self, response_text, is_json):
+        """
+        Converts raw model text into (data, repairs) for _generate_with_fallback.
+        JSON is extracted and repaired in one pass (code fences, trailing junk, raw newlines,
+        truncation); only unrecoverable output raises. repairs lists what was fixed.
         """
+        if not is_json:
+            return response_text, []
 
-    def _generate_with_fallback(self, prompt, is_json=True):
+        data, repairs = parse_model_json(response_text)
+        if repairs:
+            print(f"Repaired model JSON: {', '.join(repairs)}")
+        return data, repairs
+
+    def _open_response(self, model_name, prompt, gen_config, reserved_tokens, stream=False, system_instruction=None, cached_prompt=None):
+        """
+        Sends one request for `model_name` through the key pool: best-ranked key first,
+        failing over to the next key on 429 / transient errors.
+        cached_prompt = (static prefix, suffix): the prefix is served from the context cache and
+        only the suffix is sent; if no cache handle is available (or it fails) the full prompt is sent.
+        Returns (response, api_key, started, error).
+        """
+        error = f"{model_name} 모델을 사용할 수 있는 API 키가 없습니다."
+        keys = self.key_pool.candidates(model_name)
+        for i, api_key in enumerate(keys):
+            # Busy keys are skipped; only the last candidate waits for a free slot
+            allowed, limit_error = RATE_LIMITER.acquire(api_key, model_name, reserved_tokens, max_wait=None if i == len(keys) - 1 else 0)
+            if not allowed:
+                error = limit_error
+                continue
+
+            started = time.time()
+            cache_name = None
+            if cached_prompt:
+                cache_name = self.context_cache.get(api_key, model_name, system_instruction, cached_prompt[0])
+            try:
+                if cache_name:
+                    try:
+                        model = get_model(api_key, model_name, self.safety_settings, cached_content=cache_name)
+                        response = model.generate_content(cached_prompt[1], generation_config=gen_config, stream=stream)
+                        return response, api_key, started, None
+                    except Exception as e:
+                        if HEALTH.classify(str(e)) == "quota":
+                            raise
+                        # Handle expired or rejected: drop it and send the full prompt instead
+                        print(f"Cached request failed ({model_name}), resending the full prompt: {e}")
+                        self.context_cache.invalidate(cache_name)
+                        started = time.time()
+
+                model = get_model(api_key, model_name, self.safety_settings, system_instruction)
+                response = model.generate_content(prompt, generation_config=gen_config, stream=stream)
+                return response, api_key, started, None
+            except Exception as e:
+                error = str(e)
+                kind = HEALTH.record_failure(api_key, model_name, error)
+                print(f"Model {model_name} failed ({kind}) on key #{self.key_pool.keys.index(api_key) + 1}: {error}")
+                if kind == "not_found":
+                    break  # The model itself is missing; other keys won't have it either
+        return None, None, None, error
+
+    def _generate_with_fallback(self, prompt, is_json=True, use_cache=True, system_instruction=None, cached_prompt=None):
         """
         Internal helper: Tries primary model first, then fallbacks.
         Handles JSON parsing and common errors.
+        With use_cache, identical requests are served from the local response cache.
+        """
+        data, _, error = self._generate(prompt, is_json, use_cache, system_instruction, cached_prompt)
+        return data, error
+
+    def _generate(self, prompt, is_json=True, use_cache=True, system_instruction=None, cached_prompt=None):
+        """
+        _generate_with_fallback that also returns the JSON repairs: (data, repairs, error).
+        Responses repaired from a cut-off output are returned but never cached. Only when the body
+        itself was lost (_body_lost) is the next model tried; the partial result is then returned
+        only if no model gives a complete one.
         """
-        # Create a priority list: primary model first, then others
-        trial_models = [self.primary_model_name] + [m for m in self.available_models if m != self.primary_model_name]
+        gen_config = {"response_mime_type": "application/json"} if is_json else {}
+        cache_key = RESPONSE_CACHE.make_key(self.primary_model_name, prompt, gen_config, is_json, system_instruction)
+        if use_cache:
+            cached_text = RESPONSE_CACHE.get(cache_key)
+            if cached_text is not None:
+                try:
+                    data, repairs = self._parse_response(cached_text, is_json)
+                    if not _body_lost(data, repairs):  # Entries cached before cut-off responses were excluded
+                        print(f"Response cache hit ({self.primary_model_name})")
+                        return data, repairs, None
+                except Exception:
+                    pass  # Unreadable entry: fall through to the network
+
+        # Priority list from the shared health table: primary model first (if healthy),
+        # then healthy fallbacks fastest first. Open circuits (404 / 429 cooldown) are skipped.
+        trial_models = self.key_pool.order_models(self.primary_model_name, self.available_models)
+        if not trial_models:
+            all_models = [self.primary_model_name] + self.available_models
+            wait = self.key_pool.seconds_until_available(all_models)
+            if wait is None:
+                return None, [], "사용 가능한 모델이 없습니다. 모델 이름 또는 API 키를 확인해 주세요."
+            return None, [], f"모든 모델의 할당량이 일시적으로 소진되었습니다. 약 {wait}초 후 다시 시도해 주세요."
         
         last_error = "모든 가용 모델의 할당량을 초과했거나 연결에 실패했습니다."
+        reserved_tokens = estimate_tokens((system_instruction or "") + prompt)
+        truncated = None  # (data, repairs) of the first cut-off response
         
         for model_name in trial_models:
             print(f"Attempting task with model: {model_name}...")
+            # Waits for a local quota slot (rate limiter) instead of finding out through a 429
+            response, api_key, started, error = self._open_response(
+                model_name, prompt, gen_config, reserved_tokens, system_instruction=system_instruction, cached_prompt=cached_prompt
+            )
+            if response is None:
+                last_error = error
+                continue
+
+            HEALTH.record_success(api_key, model_name, time.time() - started)
+            RATE_LIMITER.record_usage(api_key, model_name, reserved_tokens, _usage_tokens(response))
+
+            try:
+                response_text = response.text
+            except ValueError:
+                # No text parts (e.g. blocked by safety filters)
+                response_text = ""
+
+            if not response_text:
+                if response.prompt_feedback:
+                    last_error = f"보안 필터 차단 ({model_name}): {response.prompt_feedback}"
+                continue
+
             try:
-                model = genai.GenerativeModel(model_name=model_name, safety_settings=self.safety_settings)
-                
-                gen_config = {"response_mime_type": "application/json"} if is_json else {}
-                response = model.generate_content(prompt, generation_config=gen_config)
-                
-                if not response.text:
-                    if response.prompt_feedback:
-                        last_error = f"보안 필터 차단 ({model_name}): {response.prompt_feedback}"
-                    continue
-
-                if is_json:
-                    # Strip markdown code blocks if present
-                    text = response.text.strip()
-                    if text.startswith("```json"):
-                        text = text.replace("```json", "", 1).replace("```", "", 1).strip()
-                    elif text.startswith("```"):
-                        text = text.replace("```", "", 1).replace("```", "", 1).strip()
-                    
-                    data = json.loads(text)
-                    return data, None
-                else:
-                    return response.text, None
-                
+                data, repairs = self._parse_response(response_text, is_json)
             except Exception as e:
-                last_error = str(e)
-                print(f"Model {model_name} failed: {last_error}")
-                # Skip 404 or 429
-                if "429" in last_error or "ResourceExhausted" in last_error or "404" in last_error or "not found" in last_error.lower():
-                    continue
-                else:
-                    # Might be a transient error, wait briefly and try next model
-                    time.sleep(2)
-                    continue
-        
-        return None, last_error
+                last_error = f"JSON 파싱 실패 ({model_name}): {e}"
+                print(last_error)
+                continue
+
+            if _body_lost(data, repairs):
+                print(f"Response from {model_name} was cut off in the body; trying the next model")
+                truncated = truncated or (data, repairs)
+                continue
 
-    def generate_blog_post(self, topic, prompt_template):
+            if not _incomplete(repairs):
+                RESPONSE_CACHE.put(cache_key, model_name, response_text)
+            return data, repairs, None
+
+        if truncated:
+            return truncated[0], truncated[1], None
+        return None, [], last_error
+
+    def _build_blog_prompt(self, topic, prompt_template):
         """
-        Orchestrates main blog generation.
+        Builds the per-request part of the blog prompt: the template rendered for `topic`.
+        The system instruction and output format travel in the model's system instruction.
         """
-        try:
-            prompt = prompt_template.replace("{topic}", topic)
-        except Exception:
-            prompt = f"Topic: {topic}\n\n" + prompt_template
- 
-        full_prompt = f"""
-        {self.system_instruction}
-        
-        [USER REQUEST]
-        {prompt}
-        
-        ⚠️ [CRITICAL: OUTPUT FORMAT]
-        반드시 아래의 JSON 형식을 엄격히 준수하여 응답하세요. 다른 텍스트 설명은 포함하지 마세요.
-        {{
-            "title": "SEO 최적화된 제목",
-            "thumbnail_title": "이미지에 들어갈 핵심 키워드 + ' >'",
-            "content": "HTML 형식의 본문 내용 (한글 1,600자 이상)",
-            "tags": ["태그1", "태그2", "태그3", "태그4", "태그5"],
-            "image_prompt": "이미지 생성을 위한 상세 영어 프롬프트",
-            "image_keywords": "이미지 테마 영문 키워드 2-3개"
-        }}
-        """
-        data, error = self._generate_with_fallback(full_prompt, is_json=True)
+        compiled = compile_template(prompt_template)
+        prompt = compiled.render(topic=topic)
+        if "topic" not in compiled.placeholders:
+            prompt = f'주제 (키워드): "{topic}"\n\n' + prompt
+        return prompt
+
+    def _build_cached_blog_prompt(self, topic, prompt_template):
+        """
+        Splits the blog prompt for context caching into (static prefix, per-topic suffix).
+        The prefix is the template with a literal {topic} marker, so it is identical for every topic.
+        """
+        prefix = "[TEMPLATE]\n" + compile_template(prompt_template).render(topic="{topic}")
+        suffix = f'[USER REQUEST]\n위 서식의 {{topic}} 자리를 모두 "{topic}"(으)로 바꿔서, 이 주제로 서식에 맞춰 작성하세요.'
+        return prefix, suffix
+
+    def _finalize_blog_data(self, data, repairs=None):
+        """Cleans the title/body; JSON repairs (e.g. "truncated") are kept under data["repairs"]."""
         if data:
             if 'title' in data:
                 data['title'] = self._strip_html(data['title'])
             if 'content' in data:
                 data['content'] = self._clean_residue(data['content'])
-        return data, error
+            if repairs:
+                data['repairs'] = list(repairs)
+        return data
+
+    def generate_blog_post(self, topic, prompt_template, use_cache=True, use_context_cache=False):
+        """
+        Orchestrates main blog generation.
+        With use_context_cache the template prefix is cached server-side and only the topic is sent.
+        """
+        full_prompt = self._build_blog_prompt(topic, prompt_template)
+        cached_prompt = self._build_cached_blog_prompt(topic, prompt_template) if use_context_cache else None
+        data, repairs, error = self._generate(
+            full_prompt, is_json=True, use_cache=use_cache, system_instruction=BLOG_SYSTEM_INSTRUCTION, cached_prompt=cached_prompt
+        )
+        return self._finalize_blog_data(data, repairs), error
+
+    def generate_blog_post_stream(self, topic, prompt_template, use_cache=True, use_context_cache=False):
+        """
+        Streaming variant of generate_blog_post. Yields events:
+        - {"type": "partial", "model", "fields", "content"}: closed JSON fields so far
+          (title, tags, image_keywords, ...) and the partial HTML body
+        - {"type": "done", "data", "error"}: final result, same as generate_blog_post
+        If a model fails mid-stream the next model starts over; its partial events replace the old ones.
+        """
+        full_prompt = self._build_blog_prompt(topic, prompt_template)
+        cached_prompt = self._build_cached_blog_prompt(topic, prompt_template) if use_context_cache else None
+        gen_config = {"response_mime_type": "application/json"}
+        cache_key = RESPONSE_CACHE.make_key(self.primary_model_name, full_prompt, gen_config, True, BLOG_SYSTEM_INSTRUCTION)
+
+        if use_cache:
+            cached_text = RESPONSE_CACHE.get(cache_key)
+            if cached_text is not None:
+                try:
+                    data, repairs = self._parse_response(cached_text, True)
+                    if not _body_lost(data, repairs):
+                        yield {"type": "done", "data": self._finalize_blog_data(data, repairs), "error": None}
+                        return
+                except Exception:
+                    pass
+
+        trial_models = self.key_pool.order_models(self.primary_model_name, self.available_models)
+        last_error = "모든 가용 모델의 할당량을 초과했거나 연결에 실패했습니다."
+        if not trial_models:
+            wait = self.key_pool.seconds_until_available([self.primary_model_name] + self.available_models)
+            if wait is not None:
+                last_error = f"모든 모델의 할당량이 일시적으로 소진되었습니다. 약 {wait}초 후 다시 시도해 주세요."
+
+        reserved_tokens = estimate_tokens(BLOG_SYSTEM_INSTRUCTION + full_prompt)
+        truncated = None
+        for model_name in trial_models:
+            print(f"Streaming task with model: {model_name}...")
+            # The first chunk is requested here, so 429s fail over to the next key before any output
+            response, api_key, started, error = self._open_response(
+                model_name, full_prompt, gen_config, reserved_tokens, stream=True,
+                system_instruction=BLOG_SYSTEM_INSTRUCTION, cached_prompt=cached_prompt
+            )
+            if response is None:
+                last_error = error
+                continue
+
+            extractor = IncrementalFieldExtractor()
+            received = []
+            try:
+                for chunk in response:
+                    try:
+                        piece = chunk.text
+                    except ValueError:
+                        piece = ""
+                    if not piece:
+                        continue
+                    received.append(piece)
+                    extractor.feed(piece)
+                    yield {
+                        "type": "partial",
+                        "model": model_name,
+                        "fields": dict(extractor.fields),
+                        "content": extractor.partial("content") or "",
+                    }
+            except Exception as e:
+                last_error = str(e)
+                kind = HEALTH.record_failure(api_key, model_name, last_error)
+                print(f"Model {model_name} failed while streaming ({kind}): {last_error}")
+                continue
+
+            HEALTH.record_success(api_key, model_name, time.time() - started)
+            RATE_LIMITER.record_usage(api_key, model_name, reserved_tokens, _usage_tokens(response))
+            response_text = "".join(received)
+            if not response_text:
+                last_error = f"빈 응답 또는 보안 필터 차단 ({model_name})"
+                continue
+
+            try:
+                data, repairs = self._parse_response(response_text, True)
+            except Exception as e:
+                last_error = f"JSON 파싱 실패 ({model_name}): {e}"
+                print(last_error)
+                continue
+
+            if _body_lost(data, repairs):
+                print(f"Response from {model_name} was cut off in the body; trying the next model")
+                truncated = truncated or (data, repairs)
+                continue
+
+            if not _incomplete(repairs):
+                RESPONSE_CACHE.put(cache_key, model_name, response_text)
+            yield {"type": "done", "data": self._finalize_blog_data(data, repairs), "error": None}
+            return
+
+        if truncated:
+            yield {"type": "done", "data": self._finalize_blog_data(*truncated), "error": None}
+            return
+        yield {"type": "done", "data": None, "error": last_error}
 
     def _strip_html(self, text):
         """
@@ -131,8 +478,7 @@ class ContentGenerator:
         """
         if not text: return text
         # Use a more robust regex for all tags including multi-line
-        clean = re.compile(r'<[^>]*>', re.DOTALL)
-        return re.sub(clean, '', text).strip()
+        return _TAG_RE.sub('', text).strip()
 
     def _clean_residue(self, text):
         """
@@ -140,24 +486,33 @@ class ContentGenerator:
         """
         if not text: return text
         # Remove trailing JSON-like characters that AI sometimes leaks
-        cleaned = re.sub(r'\s*[}\]]+\s*$', '', text.strip())
+        cleaned = _RESIDUE_RE.sub('', text.strip())
         # Remove triple backticks if still present
         cleaned = cleaned.replace("```html", "").replace("```", "").strip()
         return cleaned
 
-    def verify_and_rewrite(self, content, topic):
+    def _build_refine_prompt(self, content, stages, topic=None):
         """
-        Verifies if the content is up-to-date and rewrites it.
+        Builds one refinement prompt. A single stage keeps its own role;
+        several stages are fused into one checklist answered with a single JSON response.
         """
-        prompt = f"""
-        당신은 전문 사실 확인 및 콘텐츠 편집가입니다.
-        다음 주제({topic})에 대해 작성된 블로그 본문(HTML 형식)을 검토해주세요.
+        topic = topic or ""
+        if len(stages) == 1:
+            stage = stages[0]
+            header = stage.role.replace("{topic}", topic)
+            body = f"[{stage.heading}]\n{stage.instructions}"
+        else:
+            header = "당신은 한국어 블로그 콘텐츠 편집팀입니다.\n        아래 작업을 순서대로 모두 적용하여 블로그 본문(HTML 형식)을 한 번에 다듬어주세요."
+            if topic:
+                header += f"\n        주제: {topic}"
+            body = "\n\n        ".join(
+                f"[작업 {i}. {stage.title}]\n{stage.instructions}" for i, stage in enumerate(stages, 1)
+            )
 
-        [검토 지침]
-        1. 정보의 최신성: 2026년 2월 현재 기준으로 정보가 정확하고 최신인지 확인하세요.
-        2. 내용 보완: 부족하거나 틀린 정보가 있다면 실제 팩트에 기반하여 자연스럽게 수정하거나 보완하세요.
-        3. 기존 스타일 유지: 제공된 HTML 구조와 스타일을 그대로 유지하면서 내용만 개선하세요.
-        4. 말투: 친절한 해요체 유지. 이모지 사용 금지.
+        return f"""
+        {header}
+
+        {body.replace("{topic}", topic)}
 
         [본문 내용]
         {content}
@@ -165,31 +520,123 @@ class ContentGenerator:
         [건의]
         반드시 JSON 형식으로 반환하세요. "content" 필드에 HTML을 담으세요.
         """
-        result, error = self._generate_with_fallback(prompt, is_json=True)
-        if result:
-            return self._clean_residue(result.get('content')), None
-        return None, error
 
-    def spell_check_and_refine(self, content):
+    def _build_segment_prompt(self, texts, stages, topic=None):
         """
-        Corrects spelling and grammar.
+        Builds a refinement prompt for the text nodes of one section (HTML tags masked out).
         """
-        prompt = f"""
-        당신은 한국어 교열 전문가입니다.
-        다음 HTML 본문의 맞춤법, 띄어쓰기, 문법을 교정하고 문장을 더 매끄럽게 다듬어주세요.
+        topic = topic or ""
+        checklist = "\n\n        ".join(
+            f"[작업 {i}. {stage.title}]\n        {stage.instructions}" for i, stage in enumerate(stages, 1)
+        )
+        segments = json.dumps({"segments": texts}, ensure_ascii=False, indent=2)
+        return f"""
+        당신은 한국어 블로그 콘텐츠 편집가입니다.
+        주제({topic})에 대한 블로그 글의 한 섹션에서 HTML 태그를 제외한 텍스트 조각만 추출했습니다.
+        아래 작업을 적용하여 각 텍스트 조각을 다듬어주세요.
 
-        [주의 사항]
-        1. HTML 태그는 절대 건드리지 마세요. 태그 내부의 텍스트만 교정하세요.
-        2. 가급적 원래의 의미를 훼손하지 않으면서 자연스러운 문장으로 만드세요.
-        3. 이모지는 절대 사용하지 마세요.
+        {checklist.replace("{topic}", topic)}
 
-        [본문 내용]
-        {content}
+        [조각 규칙]
+        1. "segments" 배열의 각 항목을 다듬은 결과를 같은 순서, 같은 개수로 반환하세요.
+        2. 조각을 합치거나 나누지 말고, 수정할 필요가 없는 조각은 그대로 반환하세요.
+        3. HTML 태그를 추가하지 마세요.
+
+        [텍스트 조각]
+        {segments}
 
         [건의]
-        반드시 JSON 형식으로 반환하세요. "content" 필드에 HTML을 담으세요.
+        반드시 JSON 형식으로 반환하세요. {{"segments": ["...", "..."]}}
+        """
+
+    def _refine_section(self, section_html, stages, topic, use_cache):
+        """
+        Refines one section's text nodes and patches them back.
+        Returns (html, changed_count, error); on any mismatch the section is returned untouched.
+        changed_count is None when the section has no text to refine.
+        """
+        masked = MaskedSection(section_html)
+        texts = masked.texts
+        if not texts:
+            return section_html, None, None
+
+        prompt = self._build_segment_prompt(texts, stages, topic)
+        result, error = self._generate_with_fallback(prompt, is_json=True, use_cache=use_cache)
+        new_texts = result.get('segments') if isinstance(result, dict) else None
+        if not isinstance(new_texts, list) or len(new_texts) != len(texts):
+            return section_html, 0, error or "섹션 응답의 조각 수가 일치하지 않습니다."
+
+        patched, changed = masked.patch(new_texts)
+        return patched, changed, None
+
+    def _refine_by_sections(self, content, stages, topic, use_cache, max_workers):
+        """
+        Splits the body at <h2>/<h3> boundaries and refines independent sections in parallel.
+        Unchanged or failed sections keep their original markup byte for byte.
+        """
+        sections = split_sections(content)
+        if not sections:
+            return None, "다듬을 본문이 없습니다."
+
+        results = [None] * len(sections)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sections)))) as pool:
+            futures = {
+                pool.submit(self._refine_section, section, stages, topic, use_cache): i
+                for i, section in enumerate(sections)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = (sections[i], 0, str(e))
+
+        attempted = [r for r in results if r[1] is not None or r[2]]
+        errors = [error for _, _, error in attempted if error]
+        if attempted and len(errors) == len(attempted):
+            return None, errors[0]
+
+        changed = sum(count or 0 for _, count, _ in results)
+        print(f"Section refinement: {changed} text nodes changed in {len(sections)} sections")
+        return "".join(html for html, _, _ in results), None
+
+    def refine(self, content, topic=None, stages=("fact_check", "spell_check"), fuse=True,
+               use_cache=True, by_section=False, max_workers=4):
+        """
+        Runs refinement stages over the HTML body.
+        stages: names in REFINEMENT_STAGES or RefinementStage objects, applied in order.
+        fuse=True sends every stage in one model call; fuse=False makes one call per stage.
+        by_section=True sends only the text nodes of each <h2>/<h3> section (tags masked)
+        and refines sections in parallel, patching changed text back into the original markup.
+        Returns (content, error).
+        """
+        stage_objs = [REFINEMENT_STAGES[s] if isinstance(s, str) else s for s in stages]
+        if not stage_objs:
+            return content, None
+
+        groups = [stage_objs] if fuse else [[stage] for stage in stage_objs]
+        for group in groups:
+            if by_section:
+                content, error = self._refine_by_sections(content, group, topic, use_cache, max_workers)
+                if content is None:
+                    return None, error
+                continue
+
+            prompt = self._build_refine_prompt(content, group, topic)
+            result, error = self._generate_with_fallback(prompt, is_json=True, use_cache=use_cache)
+            if not result or not result.get('content'):
+                return None, error or "AI 응답에 본문(content)이 없습니다."
+            content = self._clean_residue(result.get('content'))
+        return content, None
+
+    def verify_and_rewrite(self, content, topic, use_cache=True, by_section=False):
+        """
+        Verifies if the content is up-to-date and rewrites it.
+        """
+        return self.refine(content, topic, stages=("fact_check",), use_cache=use_cache, by_section=by_section)
+
+    def spell_check_and_refine(self, content, use_cache=True, by_section=False):
+        """
+        Corrects spelling and grammar.
         """
-        result, error = self._generate_with_fallback(prompt, is_json=True)
-        if result:
-            return self._clean_residue(result.get('content')), None
-        return None, error
+        return self.refine(content, stages=("spell_check",), use_cache=use_cache, by_section=by_section)
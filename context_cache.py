@@ -0,0 +1,144 @@
+import abc
+import datetime
+import hashlib
+import threading
+import time
+
+DEFAULT_TTL = 3600          # seconds a cached prefix lives on the server
+REFRESH_MARGIN = 300        # extend the TTL when less than this is left
+FAILURE_BACKOFF = 3600      # don't retry a (key, model, prefix) that could not be cached for this long
+
+
+class ContextCacheBackend(abc.ABC):
+    """
+    Interface for server-side prompt-prefix caches.
+    create() returns a handle name; refresh() extends its TTL; delete() drops it.
+    Implementations raise on failure (the manager falls back to uncached requests).
+    """
+
+    @abc.abstractmethod
+    def create(self, api_key, model_name, system_instruction, prefix, ttl):
+        ...
+
+    @abc.abstractmethod
+    def refresh(self, api_key, name, ttl):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, api_key, name):
+        ...
+
+
+class GeminiContextCacheBackend(ContextCacheBackend):
+    """Gemini CachedContent through a per-key CacheService client (no global genai.configure)."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, api_key):
+        import google.ai.generativelanguage as glm
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = glm.CacheServiceClient(client_options={"api_key": api_key})
+                self._clients[api_key] = client
+            return client
+
+    def create(self, api_key, model_name, system_instruction, prefix, ttl):
+        import google.ai.generativelanguage as glm
+        cached = self._client(api_key).create_cached_content(glm.CreateCachedContentRequest(
+            cached_content=glm.CachedContent(
+                model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+                system_instruction=glm.Content(parts=[glm.Part(text=system_instruction)]),
+                contents=[glm.Content(role="user", parts=[glm.Part(text=prefix)])],
+                ttl=datetime.timedelta(seconds=ttl),
+            )
+        ))
+        return cached.name
+
+    def refresh(self, api_key, name, ttl):
+        import google.ai.generativelanguage as glm
+        self._client(api_key).update_cached_content(glm.UpdateCachedContentRequest(
+            cached_content=glm.CachedContent(name=name, ttl=datetime.timedelta(seconds=ttl)),
+            update_mask={"paths": ["ttl"]},
+        ))
+
+    def delete(self, api_key, name):
+        import google.ai.generativelanguage as glm
+        self._client(api_key).delete_cached_content(glm.DeleteCachedContentRequest(name=name))
+
+
+class ContextCacheManager:
+    """
+    Reuses one server-side cache per (API key, model, system instruction, prefix).
+    - handles are created on first use and refreshed shortly before they expire
+    - if creating one fails (e.g. prefix below the model's minimum cacheable size, or the
+      model does not support caching) get() returns None for FAILURE_BACKOFF seconds and
+      callers send the full prompt instead
+    Network calls run under a per-entry lock, so one slow create() only holds up callers
+    that need the same prefix on the same key and model.
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, refresh_margin=REFRESH_MARGIN):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._entries = {}
+        self._entry_locks = {}
+        self._lock = threading.Lock()  # Guards _entries / _entry_locks only
+
+    @staticmethod
+    def _key(api_key, model_name, system_instruction, prefix):
+        payload = "\x1f".join([api_key or "", model_name, system_instruction or "", prefix])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, api_key, model_name, system_instruction, prefix):
+        """Returns a cache handle name, or None when the prefix can't be cached right now."""
+        key = self._key(api_key, model_name, system_instruction, prefix)
+        with self._lock:
+            entry_lock = self._entry_locks.setdefault(key, threading.Lock())
+
+        with entry_lock:
+            now = time.time()
+            with self._lock:
+                entry = dict(self._entries.get(key) or {})
+            if entry.get("failed_until", 0) > now:
+                return None
+
+            if entry.get("name"):
+                if entry["expires_at"] - now > self.refresh_margin:
+                    return entry["name"]
+                if entry["expires_at"] > now:
+                    try:
+                        self.backend.refresh(api_key, entry["name"], self.ttl)
+                        self._publish(key, {"name": entry["name"], "expires_at": now + self.ttl})
+                        return entry["name"]
+                    except Exception as e:
+                        print(f"Context cache refresh failed ({model_name}): {e}")
+
+            try:
+                name = self.backend.create(api_key, model_name, system_instruction, prefix, self.ttl)
+            except Exception as e:
+                print(f"Context cache unavailable for {model_name}, sending full prompts: {e}")
+                self._publish(key, {"failed_until": now + FAILURE_BACKOFF})
+                return None
+
+            self._publish(key, {"name": name, "expires_at": now + self.ttl})
+            print(f"Context cache created for {model_name}: {name}")
+            return name
+
+    def _publish(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+
+    def invalidate(self, name):
+        """Forgets a handle the server no longer knows (e.g. expired early)."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.get("name") == name:
+                    del self._entries[key]
+
+
+# Shared by every ContentGenerator in the process
+CONTEXT_CACHE = ContextCacheManager(GeminiContextCacheBackend())
@@ -1,53 +1,278 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
 import streamlit as st
+import hashlib
 import json
+import os
+import threading
+import time
+
+COLLECTION = "blog_generator"
+LEGACY_DOC = "custom_templates"  # Old layout: one document with a {"templates": {...}} map
+META_DOC = "templates_meta"      # {"version": int, "updated_at": timestamp}
+TEMPLATES_SUBCOLLECTION = "templates"  # blog_generator/templates_meta/templates/{doc_id}
+CACHE_TTL = 30  # Seconds between "has anything changed" checks against the meta document
+
+# In-process cache shared by every FirebaseSync instance (each rerun builds a new one).
+# "live" is set while the snapshot listener keeps it current; "revision" counts content changes.
+_CACHE = {"templates": None, "version": None, "checked_at": 0.0, "live": False, "revision": 0}
+_CACHE_LOCK = threading.RLock()
+
+# One snapshot listener per process: {"watch": Watch, "mirror": TemplateStore}
+_LISTENER = {}
+_LISTENER_LOCK = threading.Lock()
+
+
+def template_doc_id(name):
+    """Firestore-safe document ID for a template name (names may contain '/', '.', etc.)."""
+    return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
 
 class FirebaseSync:
-    def __init__(self):
+    """
+    Template sync with Firestore.
+    - each template is its own document, so saves/deletes touch only what changed
+    - a small meta document carries a version counter; reads check it at most every
+      CACHE_TTL seconds and re-read the templates only when the version moved
+    - FIRESTORE_EMULATOR_HOST switches to the local emulator (no credentials needed)
+    """
+
+    def __init__(self, cache_ttl=CACHE_TTL):
         self.db = None
+        self.cache_ttl = cache_ttl
         self._initialize_firebase()
 
+    @staticmethod
+    def _cached_templates():
+        return dict(_CACHE["templates"]) if _CACHE["templates"] else None
+
     def _initialize_firebase(self):
         """Initializes Firebase using st.secrets if available."""
         try:
-            if not firebase_admin._apps:
+            if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+                # Emulator: the client picks up the host from the environment
+                from google.auth.credentials import AnonymousCredentials
+                from google.cloud import firestore as gcloud_firestore
+                project = os.environ.get("GCLOUD_PROJECT", "demo-blog-generator")
+                self.db = gcloud_firestore.Client(project=project, credentials=AnonymousCredentials())
+                return
+
+            if firebase_admin._apps:
+                # Already initialized by an earlier rerun in this process
+                self.db = firestore.client()
+            elif "firebase_key" in st.secrets:
                 # 1. Try to get credentials from Streamlit Secrets
-                if "firebase_key" in st.secrets:
-                    key_dict = json.loads(st.secrets["firebase_key"])
-                    cred = credentials.Certificate(key_dict)
-                    firebase_admin.initialize_app(cred)
-                    self.db = firestore.client()
-                else:
-                    st.info("💡 Firebase 설정 전입니다. 로컬 모드로 작동합니다. (배포 시 Secrets 설정 필요)")
+                key_dict = json.loads(st.secrets["firebase_key"])
+                cred = credentials.Certificate(key_dict)
+                firebase_admin.initialize_app(cred)
+                self.db = firestore.client()
+            else:
+                st.info("💡 Firebase 설정 전입니다. 로컬 모드로 작동합니다. (배포 시 Secrets 설정 필요)")
         except Exception as e:
             st.error(f"⚠️ Firebase 초기화 에러: {e}")
 
-    def fetch_templates(self):
-        """Fetches templates from Firestore."""
+    def _meta_ref(self):
+        return self.db.collection(COLLECTION).document(META_DOC)
+
+    def _templates_ref(self):
+        return self._meta_ref().collection(TEMPLATES_SUBCOLLECTION)
+
+    def _read_all(self):
+        templates = {}
+        for doc in self._templates_ref().stream():
+            data = doc.to_dict() or {}
+            if "name" in data:
+                templates[data["name"]] = data.get("prompt", "")
+        return templates
+
+    def _migrate_legacy(self):
+        """
+        Copies the old single-document map into per-template documents (once).
+        Returns (templates, version).
+        """
+        legacy = self.db.collection(COLLECTION).document(LEGACY_DOC).get()
+        templates = (legacy.to_dict() or {}).get("templates", {}) if legacy.exists else {}
+        batch = self.db.batch()
+        for name, prompt in templates.items():
+            batch.set(self._templates_ref().document(template_doc_id(name)), {
+                "name": name, "prompt": prompt, "updated_at": firestore.SERVER_TIMESTAMP,
+            })
+        batch.set(self._meta_ref(), {"version": 1, "updated_at": firestore.SERVER_TIMESTAMP})
+        batch.commit()
+        if templates:
+            print(f"Migrated {len(templates)} templates to per-template documents")
+        return templates, 1
+
+    @staticmethod
+    def revision():
+        """Changes whenever the cached cloud templates change (for memoizing derived data)."""
+        return _CACHE["revision"]
+
+    def remote_version(self):
+        """Cheap change check: one small document read. None when not set up yet."""
+        meta = self._meta_ref().get()
+        return (meta.to_dict() or {}).get("version") if meta.exists else None
+
+    def fetch_templates(self, force=False):
+        """
+        Returns {name: prompt} from the in-process cache, refreshing it from Firestore
+        only when the TTL expired and the remote version changed.
+        Firestore is read without holding the cache lock; the lock only guards the swap.
+        """
         if not self.db:
             return None
-        
+
+        with _CACHE_LOCK:
+            fresh = _CACHE["live"] or time.time() - _CACHE["checked_at"] < self.cache_ttl
+            if _CACHE["templates"] is not None and fresh and not force:
+                return self._cached_templates()
+            known_version = _CACHE["version"] if _CACHE["templates"] is not None else None
+            revision = _CACHE["revision"]
+
         try:
-            doc_ref = self.db.collection("blog_generator").document("custom_templates")
-            doc = doc_ref.get()
-            if doc.exists:
-                data = doc.to_dict().get("templates", {})
-                return data if data else None  # 빈 dict는 None으로 처리해 로컬 데이터 보존
-            return None  # 문서 없으면 None → 로컬 데이터 우선 사용
+            version = self.remote_version()
+            if version is None:
+                templates, version = self._migrate_legacy()
+            elif version == known_version:
+                templates = None  # Unchanged: keep the cached copy
+            else:
+                templates = self._read_all()
         except Exception as e:
             st.warning(f"⚠️ 클라우드 데이터를 가져오는 중 오류가 발생했습니다: {e}")
-            return None
+            return self._cached_templates()
 
-    def save_templates(self, templates_dict):
-        """Saves templates to Firestore."""
+        with _CACHE_LOCK:
+            if templates is not None and _CACHE["revision"] == revision:
+                # Skip the swap if a commit or the listener updated the cache meanwhile (newer data)
+                _CACHE.update(templates=templates, version=version)
+                _CACHE["revision"] += 1
+            _CACHE["checked_at"] = time.time()
+            return self._cached_templates()  # 빈 dict는 None으로 처리해 로컬 데이터 보존
+
+    def _commit(self, batch, changes):
+        """Commits `batch` together with a version bump and mirrors `changes` into the cache."""
+        batch.set(self._meta_ref(), {
+            "version": firestore.Increment(1),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+        batch.commit()
+
+        with _CACHE_LOCK:
+            if _CACHE["templates"] is None:
+                return
+            for name, prompt in changes.items():
+                if prompt is None:
+                    _CACHE["templates"].pop(name, None)
+                else:
+                    _CACHE["templates"][name] = prompt
+            # Our own bump; if someone else wrote meanwhile the next check won't match and re-reads
+            _CACHE["version"] = (_CACHE["version"] or 0) + 1
+            _CACHE["revision"] += 1
+
+    def save_template(self, name, prompt):
+        """Creates or updates a single template document."""
+        return self.apply_changes({name: prompt})
+
+    def delete_template(self, name):
+        """Deletes a single template document."""
+        return self.apply_changes({name: None})
+
+    def apply_changes(self, changes):
+        """
+        changes = {name: prompt or None (delete)}, written in one batch.
+        Safe to call from background threads (errors are printed, returns False).
+        """
         if not self.db:
             return False
-        
+        if not changes:
+            return True
+
         try:
-            doc_ref = self.db.collection("blog_generator").document("custom_templates")
-            doc_ref.set({"templates": templates_dict})
+            batch = self.db.batch()
+            for name, prompt in changes.items():
+                doc_ref = self._templates_ref().document(template_doc_id(name))
+                if prompt is None:
+                    batch.delete(doc_ref)
+                else:
+                    batch.set(doc_ref, {"name": name, "prompt": prompt, "updated_at": firestore.SERVER_TIMESTAMP})
+            self._commit(batch, changes)
             return True
         except Exception as e:
-            st.error(f"⚠️ 클라우드 저장 실패: {e}")
+            print(f"Cloud template save failed: {e}")
+            return False
+
+    def start_listener(self, mirror=None):
+        """
+        Starts the process-wide on_snapshot listener on the templates collection (once).
+        Every session then reads the listener-maintained cache with no Firestore reads,
+        and remote changes are mirrored into `mirror` (the local TemplateStore).
+        """
+        if not self.db:
             return False
+
+        with _LISTENER_LOCK:
+            if _LISTENER.get("watch") is not None:
+                return True
+            _LISTENER["mirror"] = mirror
+            try:
+                # Make sure the per-template layout exists before listening to it
+                if self.remote_version() is None:
+                    self._migrate_legacy()
+                _LISTENER["watch"] = self._templates_ref().on_snapshot(_on_templates_snapshot)
+                print("Firestore template listener started")
+                return True
+            except Exception as e:
+                print(f"Failed to start Firestore template listener: {e}")
+                return False
+
+    def save_templates(self, templates_dict):
+        """
+        Saves templates to Firestore, writing only the templates that were added,
+        changed or removed compared to the last known cloud state.
+        """
+        if not self.db:
+            return False
+
+        current = self.fetch_templates() or {}
+        changes = {name: prompt for name, prompt in templates_dict.items() if current.get(name) != prompt}
+        changes.update({name: None for name in current if name not in templates_dict})
+        return self.apply_changes(changes)
+
+
+def stop_listener():
+    """Stops the process-wide snapshot listener, falling back to TTL polling."""
+    with _LISTENER_LOCK:
+        watch = _LISTENER.pop("watch", None)
+        if watch is not None:
+            watch.unsubscribe()
+    with _CACHE_LOCK:
+        _CACHE["live"] = False
+
+
+def _on_templates_snapshot(docs, changes, read_time):
+    """
+    Runs on the listener's background thread (no st.* calls here).
+    Rebuilds the shared cache from the snapshot and mirrors the delta to the local file.
+    """
+    templates = {}
+    for doc in docs:
+        data = doc.to_dict() or {}
+        if "name" in data:
+            templates[data["name"]] = data.get("prompt", "")
+
+    with _CACHE_LOCK:
+        primed = _CACHE["live"]
+        previous = _CACHE["templates"] or {}
+        _CACHE.update(templates=templates, checked_at=time.time(), live=True)
+        _CACHE["revision"] += 1
+
+    delta = {name: prompt for name, prompt in templates.items() if previous.get(name) != prompt}
+    delta.update({name: None for name in previous if name not in templates})
+    mirror = _LISTENER.get("mirror")
+    if delta and mirror is not None:
+        try:
+            # First snapshot: only add what the local file lacks (local templates win, as in load)
+            mirror.apply_remote(delta, only_missing=not primed)
+        except Exception as e:
+            print(f"Failed to mirror cloud templates locally: {e}")
+
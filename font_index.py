@@ -0,0 +1,197 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+
+import requests
+from PIL import Image, ImageDraw, ImageFont
+
+CACHE_DIR = ".cache"
+INDEX_PATH = os.path.join(CACHE_DIR, "font_index.json")
+INDEX_VERSION = 1
+
+FONT_DIR = "fonts"
+LOCAL_FONT_PATH = os.path.join(FONT_DIR, "NanumGothicBold.ttf")
+FONT_URL = "https://github.com/google/fonts/raw/main/ofl/nanumgothic/NanumGothic-Bold.ttf"
+
+FONT_PATTERNS = [
+    "*malgun*", "*nanum*", "*gulim*", "*dotum*", "*batang*",
+    "*noto*korean*", "*noto*cjk*", "*unfonts*", "*baekmuk*"
+]
+BOLD_MARKERS = ['bold', 'bd', 'eb', 'heavy', 'black', 'medium']
+
+
+def default_search_dirs():
+    """Paths to search based on OS."""
+    if os.name == 'nt':  # Windows
+        return [r"C:\Windows\Fonts"]
+    return [  # Linux / Streamlit Cloud
+        "/usr/share/fonts",
+        "/usr/local/share/fonts",
+        os.path.expanduser("~/.fonts")
+    ]
+
+
+def ensure_local_font(path=LOCAL_FONT_PATH):
+    """
+    Downloads a Korean font if not available locally.
+    This ensures the app works on Streamlit Cloud/Linux without pre-installed fonts.
+    """
+    if os.path.exists(path):
+        return True
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        response = requests.get(FONT_URL, timeout=10)
+        if response.status_code == 200:
+            with open(path, "wb") as f:
+                f.write(response.content)
+            print(f"Font downloaded successfully to {path}")
+            return True
+    except Exception as e:
+        print(f"Failed to download font: {e}")
+    return False
+
+
+def _glyph_bitmap(font, char):
+    img = Image.new("L", (64, 64))
+    ImageDraw.Draw(img).text((4, 4), char, font=font, fill=255)
+    return img.tobytes()
+
+
+def inspect_font(path):
+    """
+    Loads a font once and reports its weight and whether it really renders Hangul
+    (a drawn '한' that differs from the font's missing-glyph box). Returns None if unreadable.
+    """
+    try:
+        font = ImageFont.truetype(path, 48)
+    except OSError:
+        return None
+
+    try:
+        family, style = font.getname()
+    except Exception:
+        family, style = os.path.basename(path), ""
+    descriptor = f"{os.path.basename(path)} {style}".lower()
+    weight = "bold" if any(marker in descriptor for marker in BOLD_MARKERS) else "regular"
+
+    hangul = _glyph_bitmap(font, "한")
+    renders_hangul = any(hangul) and hangul != _glyph_bitmap(font, "\uffff")
+    return {"path": path, "family": family, "style": style, "weight": weight, "hangul": bool(renders_hangul)}
+
+
+class FontIndex:
+    """
+    Persistent index of Korean-capable fonts (.cache/font_index.json).
+    The index is rebuilt only when the mtime signature of the search directories
+    (every nested directory, e.g. /usr/share/fonts/truetype/nanum) or of the local font changes.
+    """
+
+    def __init__(self, search_dirs=None, local_font_path=LOCAL_FONT_PATH, path=INDEX_PATH):
+        self.search_dirs = search_dirs if search_dirs is not None else default_search_dirs()
+        self.local_font_path = local_font_path
+        self.path = path
+        self.fonts = []
+
+    def _signature(self):
+        signature = {}
+        for d in self.search_dirs:
+            if not os.path.isdir(d):
+                continue
+            # A directory's mtime only moves when its own entries change, so walk all levels
+            for root, _, _ in os.walk(d):
+                try:
+                    signature[root] = os.path.getmtime(root)
+                except OSError:
+                    pass
+        if os.path.exists(self.local_font_path):
+            signature[self.local_font_path] = os.path.getmtime(self.local_font_path)
+        return signature
+
+    def _scan(self):
+        found = []
+        if os.path.exists(self.local_font_path):
+            found.append(self.local_font_path)
+        for d in self.search_dirs:
+            if not os.path.exists(d): continue
+            for p in FONT_PATTERNS:
+                # Recursive search for .ttf and .ttc
+                found.extend(glob.glob(os.path.join(d, "**", p + ".t*"), recursive=True))
+
+        fonts = []
+        for path in dict.fromkeys(found):  # Deduplicate, keep priority
+            info = inspect_font(path)
+            if info:
+                fonts.append(info)
+        return fonts
+
+    def load(self):
+        """
+        Loads the persisted index, rebuilding it if missing or stale.
+        Returns True when a rebuild happened.
+        """
+        signature = self._signature()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("signature") == signature:
+                self.fonts = data.get("fonts", [])
+                return False
+        except (OSError, ValueError):
+            pass
+
+        self.fonts = self._scan()
+        self._save(signature)
+        return True
+
+    def _save(self, signature):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = {"version": INDEX_VERSION, "signature": signature, "fonts": self.fonts}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save font index: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def lookup(self, weight="bold", hangul=True):
+        """
+        Returns font paths ordered by preference: fonts matching both `weight` and
+        Hangul coverage first, then Hangul-capable fonts of other weights, then the rest
+        (only when hangul=False).
+        """
+        def rank(info):
+            return (
+                0 if info["hangul"] else 1,
+                0 if info["weight"] == weight else 1,
+            )
+
+        candidates = [f for f in self.fonts if os.path.exists(f["path"])]
+        if hangul:
+            candidates = [f for f in candidates if f["hangul"]]
+        return [f["path"] for f in sorted(candidates, key=rank)]
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def warm_up(download=True):
+    """
+    One-time font setup for the process: downloads the bundled font if needed and
+    loads (or rebuilds) the persisted index. Later calls return the same index.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            if download:
+                ensure_local_font()
+            index = FontIndex()
+            rebuilt = index.load()
+            print(f"Font index {'rebuilt' if rebuilt else 'loaded'}: {len(index.fonts)} fonts")
+            _INDEX = index
+        return _INDEX
@@ -0,0 +1,170 @@
+import collections
+import hashlib
+import json
+import threading
+from html.parser import HTMLParser
+
+LENGTH_MIN = 1600  # Hangul characters (spaces excluded) required by the system instruction
+LENGTH_MAX = 2000
+
+_HEADINGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4}
+_SKIP_TEXT = {"script", "style"}
+_AD_MARKER = "ㄱ"  # Paragraph placeholder the prompts ask for between main paragraphs
+
+
+def _is_hangul(ch):
+    return "가" <= ch <= "힣" or "ㄱ" <= ch <= "ㅎ" or "ㅏ" <= ch <= "ㅣ"
+
+
+class _Analyzer(HTMLParser):
+    """Walks the HTML once, counting visible text and collecting structure as it goes."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.total_with_spaces = 0
+        self.total_no_spaces = 0
+        self.korean_only = 0
+        self.outline = []
+        self.sections = [{"heading": None, "level": 0, "chars": 0, "korean": 0}]
+        self.links = 0
+        self.external_links = 0
+        self.images = 0
+        self.ad_slots = 0
+        self.faq_schema = False
+        self._skip = None          # Inside <script>/<style>
+        self._script_type = None
+        self._script_text = []
+        self._heading = None       # [level, text parts] while inside a heading
+        self._open_tag = None      # Innermost open tag, to spot <p>ㄱ</p> markers
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        self._open_tag = tag
+        classes = (attrs.get("class") or "").split()
+        if tag in _SKIP_TEXT:
+            self._skip = tag
+            self._script_type = (attrs.get("type") or "").lower()
+            self._script_text = []
+        elif tag in _HEADINGS:
+            self._heading = [_HEADINGS[tag], []]
+            self.sections.append({"heading": "", "level": _HEADINGS[tag], "chars": 0, "korean": 0})
+        elif tag == "a" and attrs.get("href"):
+            self.links += 1
+            if attrs["href"].startswith(("http://", "https://")):
+                self.external_links += 1
+        elif tag == "img":
+            self.images += 1
+        elif tag == "ins" and "adsbygoogle" in classes:
+            self.ad_slots += 1
+        elif tag == "div" and "adsense-fixed" in classes:
+            self.ad_slots += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._open_tag = None
+        if tag == self._skip:
+            if self._script_type == "application/ld+json":
+                self.faq_schema = self.faq_schema or _has_faq("".join(self._script_text))
+            self._skip = None
+        elif tag in _HEADINGS and self._heading:
+            level, parts = self._heading
+            text = " ".join("".join(parts).split())
+            self.outline.append((level, text))
+            self.sections[-1]["heading"] = text
+            self._heading = None
+
+    def handle_data(self, data):
+        if self._skip:
+            self._script_text.append(data)
+            return
+        if self._open_tag == "p" and data.strip() == _AD_MARKER:
+            self.ad_slots += 1
+            return
+        if self._heading:
+            self._heading[1].append(data)
+
+        no_spaces = 0
+        korean = 0
+        for ch in data:
+            if not ch.isspace():
+                no_spaces += 1
+                if _is_hangul(ch):
+                    korean += 1
+        self.total_with_spaces += len(data)
+        self.total_no_spaces += no_spaces
+        self.korean_only += korean
+        section = self.sections[-1]
+        section["chars"] += no_spaces
+        section["korean"] += korean
+
+
+def _has_faq(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return "FAQPage" in text
+    items = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+    return any(isinstance(item, dict) and item.get("@type") == "FAQPage" for item in items)
+
+
+def _analyze(html):
+    parser = _Analyzer()
+    parser.feed(html or "")
+    parser.close()
+    sections = parser.sections if parser.sections[0]["chars"] else parser.sections[1:]
+    return {
+        "total_with_spaces": parser.total_with_spaces,
+        "total_no_spaces": parser.total_no_spaces,
+        "korean_only": parser.korean_only,
+        "sections": sections,
+        "outline": parser.outline,
+        "links": parser.links,
+        "external_links": parser.external_links,
+        "images": parser.images,
+        "ad_slots": parser.ad_slots,
+        "faq_schema": parser.faq_schema,
+    }
+
+
+_CACHE = collections.OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_SIZE = 64
+
+
+def analyze_html(html):
+    """
+    Text and structure statistics of a post body, computed in one parser pass:
+    character counts (with/without spaces, Hangul), per-section lengths, heading outline,
+    link / image / ad-slot counts and JSON-LD FAQ presence. Ad slots are adsbygoogle <ins>,
+    adsense-fixed <div> and <p>ㄱ</p> placeholders. Script, style and marker content is
+    not counted as text. Results are memoized by content hash; treat them as read-only.
+    """
+    key = hashlib.sha1((html or "").encode("utf-8")).hexdigest()
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            _CACHE.move_to_end(key)
+            return cached
+
+    result = _analyze(html)
+    with _CACHE_LOCK:
+        _CACHE[key] = result
+        while len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return result
+
+
+def check_length(html, minimum=LENGTH_MIN, maximum=LENGTH_MAX):
+    """
+    Checks the body length (Hangul characters, spaces excluded) against the range the
+    system instruction asks for.
+    Returns (ok, message); message is None when ok.
+    """
+    count = analyze_html(html)["korean_only"]
+    if count < minimum:
+        return False, f"본문 한글이 {count}자로 권장 분량({minimum:,}~{maximum:,}자)보다 {minimum - count}자 짧습니다."
+    if count > maximum:
+        return False, f"본문 한글이 {count}자로 권장 분량({minimum:,}~{maximum:,}자)보다 {count - maximum}자 깁니다."
+    return True, None
@@ -0,0 +1,61 @@
+import html
+import re
+
+# Tags whose content is never sent to the model (JSON-LD, ad scripts, styles, comments)
+_TOKEN_RE = re.compile(
+    r'(<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->|<[^>]+>)',
+    re.DOTALL | re.IGNORECASE
+)
+_HEADING_RE = re.compile(r'(?=<h[23][\s>])', re.IGNORECASE)
+_WORD_RE = re.compile(r'[0-9A-Za-z가-힣]')
+_ENTITY_RE = re.compile(r'&#?\w+;')
+
+
+def split_sections(html_content):
+    """
+    Splits the body before every <h2>/<h3> heading.
+    ''.join(split_sections(html)) == html always holds.
+    """
+    if not html_content:
+        return []
+    return [part for part in _HEADING_RE.split(html_content) if part]
+
+
+class MaskedSection:
+    """
+    A section tokenized into tags and text nodes. Only text nodes with real words are
+    exposed through `texts`; tags, scripts, entities-only nodes and ad markers ('ㄱ') stay put.
+    Texts are handed out unescaped (plain text) and escaped again when patched back in.
+    """
+
+    def __init__(self, html_content):
+        self.parts = _TOKEN_RE.split(html_content)
+        self.editable = []
+        for i, part in enumerate(self.parts):
+            if i % 2 == 1:
+                continue  # Tag / script / comment token
+            if len(_WORD_RE.findall(_ENTITY_RE.sub('', part))) >= 2:
+                self.editable.append(i)
+
+    @property
+    def texts(self):
+        return [html.unescape(self.parts[i].strip()) for i in self.editable]
+
+    def patch(self, new_texts):
+        """
+        Returns the section HTML with text nodes replaced, keeping surrounding whitespace.
+        Returns (html, changed_count).
+        """
+        parts = list(self.parts)
+        changed = 0
+        for i, new_text in zip(self.editable, new_texts):
+            original = parts[i]
+            core = html.unescape(original.strip())
+            if not isinstance(new_text, str) or not new_text.strip() or new_text.strip() == core:
+                continue
+            leading = original[:len(original) - len(original.lstrip())]
+            trailing = original[len(original.rstrip()):]
+            # Plain text from the model: "A < B" must not turn into markup
+            parts[i] = leading + html.escape(new_text.strip(), quote=False) + trailing
+            changed += 1
+        return "".join(parts), changed
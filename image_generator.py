@@ -1,39 +1,41 @@
-import urllib.parse
-import random
 import os
-import requests
-import io
-import base64
+import concurrent.futures
+import multiprocessing
+import threading
 
-class ImageGenerator:
-    def __init__(self, output_dir="generated_images"):
-        self.output_dir = output_dir
-        self.font_dir = "fonts"
-        self.local_font_path = os.path.join(self.font_dir, "NanumGothicBold.ttf")
-        
-        # Ensure local font exists for cloud environments
-        self._ensure_font_exists()
+import font_index
+import keyword_matcher
+from thumbnail_engine import BG_COLORS, BADGE_OPTIONS, choose_style, get_renderer, normalize_text, pick_font_path, render_variant_job
+from thumbnail_store import THUMBNAIL_CACHE
 
-    def _ensure_font_exists(self):
-        """
-        Downloads a Korean font if not available locally or in system paths.
-        This ensures the app works on Streamlit Cloud/Linux without pre-installed fonts.
-        """
-        if not os.path.exists(self.font_dir):
-            os.makedirs(self.font_dir)
-            
-        if not os.path.exists(self.local_font_path):
-            try:
-                # Using a reliable raw link from NanumGothic GitHub or similar
-                font_url = "https://github.com/google/fonts/raw/main/ofl/nanumgothic/NanumGothic-Bold.ttf"
-                response = requests.get(font_url, timeout=10)
-                if response.status_code == 200:
-                    with open(self.local_font_path, "wb") as f:
-                        f.write(response.content)
-                    print(f"Font downloaded successfully to {self.local_font_path}")
-            except Exception as e:
-                print(f"Failed to download font: {e}")
+# Process pool for multi-variant rendering, created on first use and shared by the process.
+# Workers are spawned, not forked: the server process runs many threads (Tornado, job workers,
+# sync/listener threads) and a forked child could inherit a lock held by one of them.
+_VARIANT_POOL = None
+_VARIANT_POOL_LOCK = threading.Lock()
+_VARIANT_POOL_MAX_WORKERS = 4
+
+
+def _get_variant_pool():
+    global _VARIANT_POOL
+    with _VARIANT_POOL_LOCK:
+        if _VARIANT_POOL is None:
+            _VARIANT_POOL = concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(_VARIANT_POOL_MAX_WORKERS, os.cpu_count() or 2),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _VARIANT_POOL
 
+
+def _reset_variant_pool(pool):
+    """Drops a broken pool so the next call starts a fresh one."""
+    global _VARIANT_POOL
+    with _VARIANT_POOL_LOCK:
+        if _VARIANT_POOL is pool:
+            _VARIANT_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+class ImageGenerator:
     # Curated Library of verified high-quality Unsplash IDs for 100% relevance
     CURATED_STOCK = {
         "sleep": "1505691722718-250393ce50d7",  # Cozy morning bed
@@ -87,182 +89,84 @@ class ImageGenerator:
 
     def _find_system_fonts(self):
         """
-        Dynamically finds available Korean-supporting fonts on Windows and Linux.
+        Returns Korean-supporting fonts, bold weights first.
+        Served from the persistent font index; the filesystem walk and font download
+        happen once per process in font_index.warm_up(), not per request.
         """
-        import glob
-        
-        # Include our local downloaded font as the absolute FIRST priority
-        found_fonts = []
-        if os.path.exists(self.local_font_path):
-            found_fonts.append(self.local_font_path)
-            
-        # Paths to search based on OS
-        search_dirs = []
-        if os.name == 'nt': # Windows
-            search_dirs = [r"C:\Windows\Fonts"]
-        else: # Linux / Streamlit Cloud
-            search_dirs = [
-                "/usr/share/fonts",
-                "/usr/local/share/fonts",
-                os.path.expanduser("~/.fonts")
-            ]
-        
-        patterns = [
-            "*malgun*", "*nanum*", "*gulim*", "*dotum*", "*batang*",
-            "*noto*korean*", "*noto*cjk*", "*unfonts*", "*baekmuk*"
-        ]
-        
-        for d in search_dirs:
-            if not os.path.exists(d): continue
-            
-            for p in patterns:
-                # Recursive search for .ttf and .ttc
-                full_pattern = os.path.join(d, "**", p + ".t*")
-                matches = glob.glob(full_pattern, recursive=True)
-                if matches:
-                    # Prioritize bold or medium weights
-                    priority = [m for m in matches if any(x in m.lower() for x in ['bold', 'bd', 'medium', 'eb'])]
-                    found_fonts.extend(priority if priority else matches)
-        
-        return list(dict.fromkeys(found_fonts)) # Deduplicate
+        index = font_index.warm_up()
+        return index.lookup(weight="bold", hangul=True) or index.lookup(weight="bold", hangul=False)
 
-    def get_jpg_thumbnail(self, text):
+    def get_renderer(self):
+        """
+        Returns the process-wide thumbnail renderer (fonts resolved and loaded once).
+        """
+        return get_renderer(pick_font_path(self._find_system_fonts()))
+
+    def get_thumbnail(self, text, seed=0):
         """
         Generates a premium 800x800 YouTube-style JPG thumbnail.
         Features: Multi-color text, heavy outlines, top badge callout.
+        The palette/badge come from `seed` (same text + seed = same image, served from cache);
+        pass a new seed to get a different variant.
+        Returns a ThumbnailHandle (bytes / file path); no base64 encoding happens here.
         """
-        from PIL import Image, ImageDraw, ImageFont, ImageFilter
-        import io
-        import base64
-        import os
-        import random
-        
-        # 1. Setup Canvas
-        size = 800
-        # Premium vibrant palettes (Deep Blue, Red, Dark Grey, Purple)
-        bg_colors = ["#0052cc", "#d32f2f", "#1a1a1b", "#4527a0", "#1b5e20", "#e65100"]
-        bg_hex = random.choice(bg_colors)
-        img = Image.new('RGB', (size, size), color=bg_hex)
-        draw = ImageDraw.Draw(img)
-        
-        # 2. Text Preparation & Smart Cleaning
-        clean_text = text.replace(">", "").replace("\"", "").replace("'", "").strip()
-        
-        # 3. Font Discovery
-        font_paths = self._find_system_fonts()
-        font = None
-        font_size = 145 # Maximum impact size
-        
-        for f_path in font_paths:
-            try:
-                # Prioritize Bold versions for that YouTube look
-                if any(x in f_path.lower() for x in ['bold', 'bd', 'eb']):
-                    font = ImageFont.truetype(f_path, font_size)
-                    badge_font = ImageFont.truetype(f_path, 45)
-                    break
-            except: continue
-        
-        if not font and font_paths:
-            font = ImageFont.truetype(font_paths[0], font_size)
-            badge_font = ImageFont.truetype(font_paths[0], 45)
-            
-        if not font:
-            font = ImageFont.load_default()
-            badge_font = ImageFont.load_default()
-            
-        # 4. Word Wrap & Layout
-        words = clean_text.split()
-        lines = []
-        current_line = ""
-        for word in words:
-            if len(current_line + word) <= 6: # Ultra tight wrap for big text
-                current_line += (word + " ")
-            else:
-                if current_line: lines.append(current_line.strip())
-                current_line = word + " "
-        if current_line: lines.append(current_line.strip())
-        lines = lines[:3] # Max 3 lines for impact
-        
-        # 5. Draw Top Badge (Call to Action)
-        badge_options = ["핵심 요약!", "위험 신호?", "깜짝 놀랄", "거의 모르는", "초간단 해결", "전문가 추천"]
-        badge_text = random.choice(badge_options)
-        
-        # Badge Background (Yellow/Orange bubble)
-        badge_w = 280
-        badge_h = 70
-        badge_x = (size - badge_w) // 2
-        badge_y = 100
-        draw.rounded_rectangle([badge_x, badge_y, badge_x + badge_w, badge_y + badge_h], radius=35, fill="#fdd835", outline="#111111", width=3)
-        
-        # Badge Text (Black)
-        try:
-            bw, bh = draw.textsize(badge_text, font=badge_font) if hasattr(draw, 'textsize') else draw.textbbox((0,0), badge_text, font=badge_font)[2:4]
-            draw.text(((size-bw)//2, badge_y + (badge_h-bh)//2 - 5), badge_text, fill="#111111", font=badge_font)
-        except: pass
+        renderer = self.get_renderer()
+        bg_hex, badge_text = choose_style(text, seed)
+        key = THUMBNAIL_CACHE.make_key(normalize_text(text), bg_hex, badge_text, renderer.font_path)
+        return THUMBNAIL_CACHE.get_or_render(key, lambda: renderer.render_jpeg(text, bg_hex, badge_text))
 
-        # 6. Draw Main Bold Text with Multi-Layer Shadow (Heavy Stroke)
-        line_height = 175
-        total_text_height = len(lines) * line_height
-        start_y = (size - total_text_height) // 2 + 50 # Shift down for badge
-        
-        for i, line in enumerate(lines):
+    def render_variants(self, text, palettes=None, badges=None):
+        """
+        Renders every palette x badge combination at once (default: all of BG_COLORS x BADGE_OPTIONS).
+        Cached variants are reused; the rest are rendered across a process pool so Pillow uses all cores.
+        Returns a list of (bg_hex, badge_text, ThumbnailHandle) in palette-major order.
+        """
+        renderer = self.get_renderer()
+        font_path = renderer.font_path
+        normalized = normalize_text(text)
+        combos = [(bg, badge) for bg in (palettes or BG_COLORS) for badge in (badges or BADGE_OPTIONS)]
+        keys = [THUMBNAIL_CACHE.make_key(normalized, bg, badge, font_path) for bg, badge in combos]
+
+        missing = [i for i, key in enumerate(keys) if THUMBNAIL_CACHE.get(key) is None]
+        if missing:
+            jobs = [(font_path, text, combos[i][0], combos[i][1]) for i in missing]
+            pool = None
             try:
-                # Get text width
-                if hasattr(draw, 'textbbox'):
-                    l, t, r, b = draw.textbbox((0, 0), line, font=font)
-                    w = r - l
-                else: w = draw.textsize(line, font=font)[0]
-            except: w = 400
-                
-            x = (size - w) // 2
-            y = start_y + (i * line_height)
-            
-            # 6a. Multi-Layer Ultra Thick Stroke (YouTube Style)
-            for dist in [6, 4, 2]:
-                for dx in range(-dist, dist+1, 2):
-                    for dy in range(-dist, dist+1, 2):
-                        draw.text((x+dx, y+dy), line, fill="#000000", font=font)
-            
-            # 6b. Main Text (Alternating Colors: White and Yellow)
-            main_color = "white" if i % 2 == 0 else "#fff176" 
-            draw.text((x, y), line, fill=main_color, font=font)
+                pool = _get_variant_pool()
+                rendered = list(pool.map(render_variant_job, jobs))
+            except Exception as e:
+                if pool is not None and isinstance(e, concurrent.futures.process.BrokenProcessPool):
+                    _reset_variant_pool(pool)
+                # e.g. process creation not permitted: render in this process instead
+                print(f"Process pool rendering failed, rendering serially: {e}")
+                rendered = [render_variant_job(job) for job in jobs]
+            for i, data in zip(missing, rendered):
+                THUMBNAIL_CACHE.put(keys[i], data)
 
-        # 7. Export to Base64 JPG
-        buffered = io.BytesIO()
-        img.save(buffered, format="JPEG", quality=92)
-        encoded = base64.b64encode(buffered.getvalue()).decode('utf-8')
-        return f"data:image/jpeg;base64,{encoded}"
+        variants = []
+        for (bg, badge), key in zip(combos, keys):
+            handle = THUMBNAIL_CACHE.get_or_render(key, lambda bg=bg, badge=badge: renderer.render_jpeg(text, bg, badge))
+            variants.append((bg, badge, handle))
+        return variants
+
+    def get_jpg_thumbnail(self, text, seed=0):
+        """
+        Same as get_thumbnail() but returns a base64 data URL, for callers that need one.
+        """
+        return self.get_thumbnail(text, seed).to_data_url()
 
     def translate_keyword(self, text):
         """
         Maps Korean/English terms to searchable tags.
-        Prioritizes the Curated Library.
+        Uses the shared indexed matcher (built-in topics + keyword_map.json),
+        ranked so curated tags and longer matches win.
         """
         if not text: return None
-        
-        text_lower = text.lower()
-        # 1. Check direct mapping from Korean topics
-        for ko, en in self.COMMON_TOPICS.items():
-            if ko in text_lower:
-                return en
-        
-        # 2. Check direct mapping if the input is already one of our keys
-        if text_lower in self.CURATED_STOCK:
-            return text_lower
+        return keyword_matcher.get_matcher(self.COMMON_TOPICS, self.CURATED_STOCK).best(text)
 
-        # 3. Process English keywords (Gemini output)
-        stop_words = ["serene", "deep", "peaceful", "beautiful", "good", "best", "the", "a", "an"]
-        clean = "".join([c if (c.isalpha() or c == ',' or c == ' ') else ' ' for c in text if ord(c) < 128])
-        parts = []
-        for p in clean.replace(',', ' ').split():
-            p_clean = p.strip().lower()
-            if p_clean and p_clean not in stop_words and len(p_clean) > 2:
-                # Check if any part matches our curated keys
-                if p_clean in self.CURATED_STOCK:
-                    return p_clean
-                parts.append(p_clean)
-        
-        return parts[0] if parts else None
+    @staticmethod
+    def stock_url(photo_id):
+        return f"https://images.unsplash.com/photo-{photo_id}?q=80&w=800&auto=format&fit=crop"
 
     def get_stock_image_url(self, title, keywords=None):
         """
@@ -273,8 +177,7 @@ class ImageGenerator:
         
         # Use curated library for guaranteed quality and relevance
         if kw and kw in self.CURATED_STOCK:
-            photo_id = self.CURATED_STOCK[kw]
-            return f"https://images.unsplash.com/photo-{photo_id}?q=80&w=800&auto=format&fit=crop"
+            return self.stock_url(self.CURATED_STOCK[kw])
             
         # If no curated match, return None to trigger fallback to beautiful text thumbnail
         return None
@@ -282,6 +185,7 @@ class ImageGenerator:
     def get_image_url(self, title, prompt=None, keywords=None, use_stock=False):
         """
         Unified method. Falls back to text thumbnail if curated stock is unavailable.
+        Returns a stock photo URL or a ThumbnailHandle.
         """
         if use_stock:
             stock_url = self.get_stock_image_url(title, keywords)
@@ -289,7 +193,7 @@ class ImageGenerator:
                 return stock_url
                 
         # Fallback to JPG text thumbnail
-        return self.get_jpg_thumbnail(title)
+        return self.get_thumbnail(title)
 
     def generate_image(self, title, prompt=None, include_text=False):
         """
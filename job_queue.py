@@ -0,0 +1,240 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+CACHE_DIR = ".cache"
+DEFAULT_PATH = os.path.join(CACHE_DIR, "jobs.sqlite")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueue:
+    """
+    Persistent local job queue (SQLite) run by a pool of worker threads.
+    - jobs have an id, kind, JSON payload, status, attempt count, JSON result and error
+    - handlers are registered per kind: handler(payload, secrets) -> (result, error)
+    - a failed attempt (error or exception) is retried until `max_attempts`
+    - secrets (API keys) are held in memory only and never written to the database;
+      jobs recovered after a restart run with empty secrets (server defaults apply)
+    Jobs outlive reruns and page reloads; every session of the process shares the workers.
+    Several processes may share the database: a running job records its owner and a heartbeat,
+    and only jobs whose heartbeat is older than `stale_after` seconds are taken over.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, workers=2, max_attempts=2, keep_for=3 * 24 * 3600,
+                 heartbeat_interval=10, stale_after=60):
+        self.path = path
+        self.workers = max(1, int(workers))
+        self.max_attempts = max_attempts
+        self.keep_for = keep_for
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        # host:pid for humans, plus a per-instance id: a restarted container often reuses both
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._secrets = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._initialized = False
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:  # Databases created before ownership was tracked
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.execute(sql, params)
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                conn.close()
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def start(self):
+        """
+        Starts the worker threads and the heartbeat thread (once). Jobs left 'running' by a
+        process that stopped heartbeating are picked up again by _claim().
+        """
+        with self._lock:
+            if self._threads:
+                return
+        now = time.time()
+        self._execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, now - self.keep_for))
+        with self._lock:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._wakeup.set()
+
+    def _heartbeat_loop(self):
+        while True:
+            try:
+                self._execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE status = ? AND owner = ?",
+                    (time.time(), RUNNING, self.owner),
+                )
+            except sqlite3.Error as e:
+                print(f"Job heartbeat failed: {e}")
+            time.sleep(self.heartbeat_interval)
+
+    def submit(self, kind, payload, secrets=None):
+        """Queues a job and returns its id."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        if secrets:
+            self._secrets[job_id] = dict(secrets)
+        self._execute(
+            "INSERT INTO jobs (id, kind, payload, status, attempts, created_at, updated_at) VALUES (?, ?, ?, ?, 0, ?, ?)",
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), QUEUED, now, now),
+        )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Returns the job as a dict (payload/result decoded), or None."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT id, kind, payload, status, attempts, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                    (job_id,),
+                ).fetchone()
+            finally:
+                conn.close()
+        if not row:
+            return None
+        return {
+            "id": row[0], "kind": row[1], "payload": json.loads(row[2]), "status": row[3],
+            "attempts": row[4], "result": json.loads(row[5]) if row[5] else None, "error": row[6],
+            "created_at": row[7], "updated_at": row[8],
+        }
+
+    def position(self, job_id):
+        """Number of queued jobs ahead of `job_id` (0 when it is next or already running)."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < (SELECT created_at FROM jobs WHERE id = ?)",
+                    (QUEUED, job_id),
+                ).fetchone()
+            finally:
+                conn.close()
+        return row[0] if row else 0
+
+    def _claim(self):
+        """
+        Atomically moves the oldest queued job (or a running job whose owner stopped
+        heartbeating) to 'running' under this process. Returns (id, kind, payload, attempts) or None.
+        Stale jobs that already used up max_attempts (e.g. they keep killing their worker process)
+        are failed instead of being run again.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE status = ? AND COALESCE(heartbeat, 0) < ? AND attempts >= ?",
+                    (FAILED, "작업 중 프로세스가 중단되었습니다. (최대 시도 횟수 초과)", now,
+                     RUNNING, now - self.stale_after, self.max_attempts),
+                )
+                row = conn.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs "
+                    "WHERE status = ? OR (status = ? AND COALESCE(heartbeat, 0) < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now - self.stale_after),
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, owner = ?, heartbeat = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, self.owner, now, now, row[0]),
+                    )
+                conn.commit()
+                return (row[0], row[1], json.loads(row[2]), row[3] + 1) if row else None
+            finally:
+                conn.close()
+
+    def _worker_loop(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job queue read failed: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(timeout=5)
+                self._wakeup.clear()
+                continue
+            self._run(*job)
+
+    def _run(self, job_id, kind, payload, attempts):
+        handler = self._handlers.get(kind)
+        result, error = None, None
+        if handler is None:
+            error = f"No handler registered for job kind '{kind}'"
+        else:
+            try:
+                result, error = handler(payload, self._secrets.get(job_id, {}))
+            except Exception as e:
+                error = str(e)
+
+        # Only the current owner finishes a job (it may have been taken over while we were stalled)
+        now = time.time()
+        if error is None:
+            self._execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), now, job_id, self.owner),
+            )
+        elif attempts < self.max_attempts and handler is not None:
+            print(f"Job {job_id} attempt {attempts} failed, retrying: {error}")
+            self._execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (QUEUED, error, now, job_id, self.owner),
+            )
+            self._wakeup.set()
+            return
+        else:
+            self._execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (FAILED, error, now, job_id, self.owner),
+            )
+        self._secrets.pop(job_id, None)
@@ -0,0 +1,149 @@
+import json
+
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def _next_significant(text, start):
+    """Returns the next non-whitespace character at or after `start`, or '' at the end."""
+    for i in range(start, len(text)):
+        if not text[i].isspace():
+            return text[i]
+    return ""
+
+
+def _drop_trailing_comma(out):
+    """Removes a ',' that is the last non-whitespace token in `out`. Returns True if removed."""
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+        return True
+    return False
+
+
+def _close(out, stack):
+    closing = "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+    return "".join(out).rstrip().rstrip(",") + closing
+
+
+def parse_model_json(text):
+    """
+    Extracts and parses the outermost JSON object from model output in one pass.
+    Repairs common defects instead of failing:
+    - code fences / prose before the object and junk or extra braces after it
+    - raw newlines, tabs and control characters inside strings
+    - invalid backslash escapes and unescaped quotes inside strings (e.g. HTML attributes)
+    - trailing commas and mismatched closers
+    - truncation: "missing_closer" when only closing brackets were missing (nothing lost),
+      "truncated" when a value was cut mid-string or an incomplete member had to be dropped
+    Returns (data, repairs) where repairs lists what was fixed. Raises ValueError if nothing usable is found.
+    """
+    if not text:
+        raise ValueError("빈 응답입니다.")
+
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("응답에서 JSON 객체를 찾을 수 없습니다.")
+
+    repairs = []
+    if text[:start].strip():
+        repairs.append("leading_text")
+
+    def note(kind):
+        if kind not in repairs:
+            repairs.append(kind)
+
+    out = []
+    stack = []
+    safe_point = None  # (output length, stack) after the last complete member
+    in_string = False
+    i = start
+    end = len(text)
+
+    while i < end:
+        c = text[i]
+
+        if in_string:
+            if c == "\\":
+                nxt = text[i + 1] if i + 1 < end else ""
+                if nxt in _VALID_ESCAPES and nxt:
+                    out.append(c + nxt)
+                    i += 2
+                    continue
+                if not nxt:
+                    i += 1  # Dangling backslash at truncation point
+                    continue
+                out.append("\\\\")
+                note("invalid_escape")
+            elif c == '"':
+                if _next_significant(text, i + 1) in (",", "}", "]", ":", ""):
+                    in_string = False
+                    out.append(c)
+                else:
+                    out.append('\\"')
+                    note("unescaped_quote")
+            elif c in _CONTROL_ESCAPES:
+                out.append(_CONTROL_ESCAPES[c])
+                note("unescaped_newline")
+            elif ord(c) < 0x20:
+                out.append("\\u%04x" % ord(c))
+                note("control_character")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            in_string = True
+            out.append(c)
+        elif c in "{[":
+            stack.append(c)
+            out.append(c)
+        elif c in "}]":
+            expected = "{" if c == "}" else "["
+            if expected not in stack:
+                note("extra_closer")
+                i += 1
+                continue
+            while stack[-1] != expected:
+                out.append("}" if stack.pop() == "{" else "]")
+                note("mismatched_closer")
+            if _drop_trailing_comma(out):
+                note("trailing_comma")
+            stack.pop()
+            out.append(c)
+            if not stack:
+                break
+        elif c == ",":
+            out.append(c)
+            safe_point = (len(out) - 1, list(stack))
+        else:
+            out.append(c)
+        i += 1
+
+    if stack:
+        # Truncated output: close what is open, or fall back to the last complete member
+        if in_string:
+            out.append('"')
+        try:
+            data = json.loads(_close(out, stack))
+            note("truncated" if in_string else "missing_closer")
+            return data, repairs
+        except ValueError:
+            pass
+        if safe_point:
+            try:
+                data = json.loads(_close(out[:safe_point[0]], safe_point[1]))
+                note("truncated")
+                return data, repairs
+            except ValueError:
+                pass
+        raise ValueError("잘린 JSON 응답을 복구할 수 없습니다.")
+
+    if text[i + 1:].strip().strip("`").strip():
+        note("trailing_text")
+
+    data = json.loads("".join(out))
+    return data, repairs
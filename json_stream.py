@@ -0,0 +1,115 @@
+import json
+
+
+class IncrementalFieldExtractor:
+    """
+    Extracts top-level fields from a JSON object while it is still being streamed.
+    feed() consumes the next chunk and returns the names of fields whose values closed in it.
+    Closed values are available in `fields`; partial(name) decodes the prefix of a string
+    value that is still open (used for the live HTML preview of "content").
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect = "key"
+        self._key = None
+        self._value_start = None
+
+    def _close_value(self, end, closed):
+        try:
+            self.fields[self._key] = json.loads(self.buffer[self._value_start:end])
+            closed.append(self._key)
+        except ValueError:
+            pass
+        self._value_start = None
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        closed = []
+        buf = self.buffer
+
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._expect == "key":
+                            try:
+                                self._key = json.loads(buf[self._string_start:i + 1])
+                            except ValueError:
+                                self._key = None
+                        elif self._value_start == self._string_start:
+                            self._close_value(i + 1, closed)
+                continue
+
+            if self._depth == 0:
+                # Skip anything before the outermost object (e.g. ```json fences)
+                if c == "{":
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if self._depth == 1 and self._expect == "value" and self._value_start is None:
+                    self._value_start = i
+            elif c in "{[":
+                if self._depth == 1 and self._expect == "value" and self._value_start is None:
+                    self._value_start = i
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 1 and self._value_start is not None:
+                    # Primitive value right before the closing brace
+                    self._close_value(i, closed)
+                self._depth -= 1
+                if self._depth == 1 and self._value_start is not None:
+                    self._close_value(i + 1, closed)
+            elif self._depth == 1:
+                if c == ":":
+                    self._expect = "value"
+                    self._value_start = None
+                elif c == ",":
+                    if self._value_start is not None:
+                        self._close_value(i, closed)
+                    self._expect = "key"
+                elif not c.isspace() and self._expect == "value" and self._value_start is None:
+                    self._value_start = i  # number / true / false / null
+
+        self._pos = len(buf)
+        return closed
+
+    def partial(self, name):
+        """
+        Returns the decoded value of `name` so far: the closed value if complete,
+        the prefix of an open string value, or None.
+        """
+        if name in self.fields:
+            return self.fields[name]
+        if not (self._in_string and self._depth == 1 and self._key == name and self._value_start == self._string_start):
+            return None
+
+        raw = self.buffer[self._value_start + 1:]
+        # Drop an incomplete escape sequence at the end of the chunk
+        cut = raw.rfind("\\")
+        if cut != -1:
+            backslashes = len(raw[:cut + 1]) - len(raw[:cut + 1].rstrip("\\"))
+            tail = raw[cut + 1:]
+            if backslashes % 2 == 1 and (not tail or (tail[0] == "u" and len(tail) < 5)):
+                raw = raw[:cut]
+        try:
+            return json.loads('"' + raw + '"')
+        except ValueError:
+            return raw
@@ -0,0 +1,78 @@
+import threading
+
+import google.ai.generativelanguage as glm
+
+from model_health import HEALTH
+from rate_limiter import RATE_LIMITER
+
+# One GenerativeService client per API key, shared by the process.
+# Models get their key's client directly instead of relying on the process-global
+# genai.configure(), so different keys can be used concurrently.
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(api_key):
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+            _CLIENTS[api_key] = client
+        return client
+
+
+def drop_client(api_key=None):
+    """Forgets the client of one key (or all of them)."""
+    with _CLIENTS_LOCK:
+        if api_key is None:
+            _CLIENTS.clear()
+        else:
+            _CLIENTS.pop(api_key, None)
+
+
+class KeyPool:
+    """
+    Set of API keys used together. For every model call the keys are ranked by
+    - circuit state (keys in 429 cooldown / 404 for that model are skipped)
+    - quota left in the local rate limiter (today's requests, then this minute's)
+    - recent latency (EWMA from the health table; unmeasured keys first)
+    so consecutive calls spread across keys and a 429 on one key fails over to the next.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(dict.fromkeys(k for k in keys if k))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, model_name):
+        """Keys worth trying for `model_name`, best first."""
+        def rank(item):
+            index, key = item
+            remaining = RATE_LIMITER.remaining(key, model_name)
+            latency = HEALTH.latency(key, model_name)
+            return (remaining["rpd"] <= 0, -remaining["rpm"], latency is not None, latency or 0.0, index)
+
+        healthy = [(i, k) for i, k in enumerate(self.keys) if HEALTH.is_available(k, model_name)]
+        return [key for _, key in sorted(healthy, key=rank)]
+
+    def order_models(self, primary_model, models):
+        """
+        Models worth trying (available on at least one key), in the health table's order:
+        primary first, then the fastest fallbacks.
+        """
+        ordered = []
+        for key in self.keys:
+            for model_name in HEALTH.order(key, primary_model, models):
+                if model_name not in ordered:
+                    ordered.append(model_name)
+        if primary_model in ordered:
+            ordered.remove(primary_model)
+            ordered.insert(0, primary_model)
+        return ordered
+
+    def seconds_until_available(self, models):
+        """Seconds until any key reopens for any of `models`, or None if none ever will."""
+        waits = [HEALTH.seconds_until_available(key, models) for key in self.keys]
+        waits = [w for w in waits if w is not None]
+        return min(waits) if waits else None
@@ -0,0 +1,165 @@
+import collections
+import json
+import os
+import re
+import threading
+
+KEYWORD_MAP_FILE = "keyword_map.json"
+STOP_WORDS = {"serene", "deep", "peaceful", "beautiful", "good", "best", "the", "a", "an"}
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring automaton: every pattern occurrence in one pass over the text,
+    independent of the number of patterns.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append(pattern)
+
+    def _build(self):
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find_all(self, text):
+        """Yields (start, pattern) for every occurrence."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for pattern in self.output[state]:
+                yield i - len(pattern) + 1, pattern
+
+
+class KeywordMatcher:
+    """
+    Ranks stock-photo tags for a Korean/English text in a single pass.
+    - Korean (non-ASCII) keys: Aho-Corasick substring matches; a match inside a longer
+      match (건강 inside 건강식) is dropped so the more specific key wins
+    - ASCII keys and curated tags: whole-token / token-phrase lookups (so 'it' no longer
+      matches inside 'fitness')
+    Candidates are ranked by score (longer and repeated matches score higher), then by
+    first position. Unknown English words are kept as low-score fallbacks.
+    """
+
+    def __init__(self, mapping, curated_keys=()):
+        self.mapping = dict(mapping)
+        self.curated = set(curated_keys)
+
+        korean_keys = [k for k in self.mapping if not k.isascii()]
+        self.automaton = AhoCorasick(korean_keys)
+
+        # Token index: first token -> [(phrase tokens, tag)]
+        self.token_index = collections.defaultdict(list)
+        ascii_pairs = [(k, v) for k, v in self.mapping.items() if k.isascii()]
+        ascii_pairs += [(k, k) for k in self.curated]
+        for key, tag in ascii_pairs:
+            tokens = tuple(_TOKEN_RE.findall(key.lower()))
+            if tokens:
+                self.token_index[tokens[0]].append((tokens, tag))
+
+    def match(self, text, limit=5):
+        """Returns [(tag, score)] best first."""
+        if not text:
+            return []
+        text_lower = text.lower()
+        scores = {}
+        first_pos = {}
+
+        def hit(tag, score, pos):
+            scores[tag] = scores.get(tag, 0) + score
+            first_pos[tag] = min(first_pos.get(tag, pos), pos)
+
+        # 1. Korean keys (longest match wins on overlaps)
+        spans = sorted(self.automaton.find_all(text_lower), key=lambda h: (h[0], -len(h[1])))
+        covered_until = -1
+        for start, pattern in spans:
+            end = start + len(pattern)
+            if end <= covered_until:
+                continue
+            covered_until = max(covered_until, end)
+            hit(self.mapping[pattern], 10 * len(pattern), start)
+
+        # 2. English tokens / phrases
+        tokens = [(m.group(), m.start()) for m in _TOKEN_RE.finditer(text_lower)]
+        words = [t for t, _ in tokens]
+        for i, (token, pos) in enumerate(tokens):
+            matched = False
+            for phrase, tag in self.token_index.get(token, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    hit(tag, 4 * len(phrase) + (2 if tag in self.curated else 0), 1000 + pos)
+                    matched = True
+            if not matched and token not in STOP_WORDS and len(token) > 2:
+                hit(token, 1, 2000 + pos)  # Unknown word: fallback search tag
+
+        ranked = sorted(scores, key=lambda tag: (-scores[tag], first_pos[tag]))
+        return [(tag, scores[tag]) for tag in ranked[:limit]]
+
+    def best(self, text):
+        ranked = self.match(text, limit=1)
+        return ranked[0][0] if ranked else None
+
+
+def load_extra_mapping(path=KEYWORD_MAP_FILE):
+    """
+    Optional data file extending the built-in mapping: {"keyword": "tag", ...}.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {str(k).lower(): str(v) for k, v in data.items()}
+    except (OSError, ValueError) as e:
+        print(f"Failed to load {path}: {e}")
+        return {}
+
+
+_MATCHERS = {}
+_MATCHERS_LOCK = threading.Lock()
+
+
+def get_matcher(base_mapping, curated_keys, path=KEYWORD_MAP_FILE):
+    """
+    Returns a process-wide matcher for the built-in mapping plus the data file.
+    Rebuilt only when the data file's mtime changes.
+    """
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    cache_key = (id(base_mapping), id(curated_keys), path)
+    with _MATCHERS_LOCK:
+        cached = _MATCHERS.get(cache_key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        mapping = dict(base_mapping)
+        mapping.update(load_extra_mapping(path))
+        matcher = KeywordMatcher(mapping, curated_keys)
+        _MATCHERS[cache_key] = (mtime, matcher)
+        return matcher
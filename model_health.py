@@ -0,0 +1,157 @@
+import re
+import threading
+import time
+
+
+class ModelHealthTracker:
+    """
+    Shared per-(api_key, model) health table used to order the fallback chain.
+    - 404 / not found: circuit stays open for that key (model unavailable)
+    - 429 / quota: circuit open until an exponential backoff deadline
+    - other errors: short cooldown that grows with consecutive failures
+    - successes: latency tracked as an EWMA and used to rank healthy models
+    """
+    QUOTA_BACKOFF = 60          # seconds, doubled for each consecutive 429
+    MAX_QUOTA_BACKOFF = 3600
+    TRANSIENT_BACKOFF = 5       # seconds, multiplied by consecutive failures
+    MAX_TRANSIENT_BACKOFF = 60
+    EWMA_ALPHA = 0.3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = {}
+
+    def _entry(self, api_key, model_name):
+        key = (api_key, model_name)
+        if key not in self._table:
+            self._table[key] = {
+                "unavailable": False,
+                "open_until": 0.0,
+                "quota_strikes": 0,
+                "failures": 0,
+                "latency": None,
+                "successes": 0,
+                "last_error": None,
+            }
+        return self._table[key]
+
+    @staticmethod
+    def classify(error_text):
+        """Maps an exception message to 'not_found', 'quota' or 'transient'."""
+        lowered = error_text.lower()
+        if "404" in error_text or "not found" in lowered:
+            return "not_found"
+        if "429" in error_text or "resourceexhausted" in lowered or "quota" in lowered:
+            return "quota"
+        return "transient"
+
+    @staticmethod
+    def _retry_delay(error_text):
+        """Reads the server-suggested retry delay (e.g. 'retry_delay { seconds: 37 }') if present."""
+        match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", error_text)
+        return int(match.group(1)) if match else 0
+
+    def record_success(self, api_key, model_name, latency):
+        with self._lock:
+            entry = self._entry(api_key, model_name)
+            entry["successes"] += 1
+            entry["failures"] = 0
+            entry["quota_strikes"] = 0
+            entry["open_until"] = 0.0
+            if entry["latency"] is None:
+                entry["latency"] = latency
+            else:
+                entry["latency"] = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * entry["latency"]
+
+    def record_failure(self, api_key, model_name, error_text):
+        """Records a failed call and opens the circuit accordingly. Returns the failure kind."""
+        kind = self.classify(error_text)
+        now = time.time()
+        with self._lock:
+            entry = self._entry(api_key, model_name)
+            entry["last_error"] = error_text[:300]
+            if kind == "not_found":
+                entry["unavailable"] = True
+            elif kind == "quota":
+                backoff = min(self.QUOTA_BACKOFF * (2 ** entry["quota_strikes"]), self.MAX_QUOTA_BACKOFF)
+                entry["quota_strikes"] += 1
+                entry["open_until"] = now + max(backoff, self._retry_delay(error_text))
+            else:
+                entry["failures"] += 1
+                entry["open_until"] = now + min(self.TRANSIENT_BACKOFF * entry["failures"], self.MAX_TRANSIENT_BACKOFF)
+        return kind
+
+    def is_available(self, api_key, model_name, now=None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self._table.get((api_key, model_name))
+            if not entry:
+                return True
+            return not entry["unavailable"] and entry["open_until"] <= now
+
+    def order(self, api_key, primary_model, models):
+        """
+        Returns the models worth trying, in order: the primary model (if healthy),
+        then healthy fallbacks fastest first. Models without latency data keep their
+        configured order after the measured ones.
+        """
+        now = time.time()
+        candidates = [primary_model] + [m for m in models if m != primary_model]
+        healthy = [m for m in candidates if self.is_available(api_key, m, now)]
+
+        with self._lock:
+            def rank(item):
+                index, name = item
+                entry = self._table.get((api_key, name))
+                latency = entry["latency"] if entry else None
+                return (latency is None, latency or 0.0, index)
+
+            fallbacks = [m for m in healthy if m != primary_model]
+            ranked = [name for _, name in sorted(enumerate(fallbacks), key=rank)]
+
+        return ([primary_model] if primary_model in healthy else []) + ranked
+
+    def latency(self, api_key, model_name):
+        """EWMA latency in seconds, or None before the first success."""
+        with self._lock:
+            entry = self._table.get((api_key, model_name))
+            return entry["latency"] if entry else None
+
+    def seconds_until_available(self, api_key, models):
+        """Seconds until the first cooling-down model reopens, or None if all are unavailable."""
+        now = time.time()
+        with self._lock:
+            deadlines = []
+            for m in models:
+                entry = self._table.get((api_key, m))
+                if entry and not entry["unavailable"]:
+                    deadlines.append(max(0.0, entry["open_until"] - now))
+                elif not entry:
+                    deadlines.append(0.0)
+        return int(min(deadlines)) + 1 if deadlines else None
+
+    def snapshot(self, api_key):
+        """Returns {model_name: status dict} for display."""
+        now = time.time()
+        with self._lock:
+            result = {}
+            for (key, model_name), entry in self._table.items():
+                if key != api_key:
+                    continue
+                if entry["unavailable"]:
+                    state = "unavailable"
+                elif entry["open_until"] > now:
+                    state = "cooldown"
+                else:
+                    state = "healthy"
+                result[model_name] = {
+                    "state": state,
+                    "retry_in": max(0, int(entry["open_until"] - now)),
+                    "latency": entry["latency"],
+                    "successes": entry["successes"],
+                }
+            return result
+
+
+# Shared across every ContentGenerator in the process
+HEALTH = ModelHealthTracker()
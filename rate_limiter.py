@@ -0,0 +1,198 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+CACHE_DIR = ".cache"
+DEFAULT_PATH = os.path.join(CACHE_DIR, "rate_limits.sqlite")
+DEFAULT_OUTPUT_TOKENS = 4096  # Reserved per call until the real usage is known
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")  # Gemini daily quotas reset at midnight Pacific
+except Exception:
+    _QUOTA_TZ = datetime.timezone.utc
+
+
+def key_id(api_key):
+    """Stable non-reversible id for an API key (keys themselves are never stored)."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def estimate_tokens(prompt, output_tokens=DEFAULT_OUTPUT_TOKENS):
+    """
+    Rough token estimate for a request: Korean text runs at about one token per 1-2 characters,
+    so len/2 plus the expected output. Corrected by record_usage() after the call.
+    """
+    return len(prompt) // 2 + output_tokens
+
+
+def _today():
+    return datetime.datetime.now(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+class RateLimiter:
+    """
+    Local quota scheduler per (API key, model), persisted in SQLite (.cache/rate_limits.sqlite).
+    - requests/minute and tokens/minute are token buckets (capacity = the limit,
+      refilled continuously over 60s)
+    - requests/day is a counter for the current quota day
+    A call reserves 1 request + its estimated tokens before it is sent; reserve() tells how long
+    to wait when a bucket is short, so callers fill the quota without tripping 429s.
+    Limits come from the model table, with per-key overrides (key_limits) for keys on
+    another tier.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, limits=None, default_limit=None, key_limits=None):
+        self.path = path
+        self.limits = limits if limits is not None else config.MODEL_RATE_LIMITS
+        self.default_limit = default_limit or config.DEFAULT_RATE_LIMIT
+        self.key_limits = key_limits if key_limits is not None else config.KEY_RATE_LIMITS
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key_id TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    day TEXT NOT NULL,
+                    day_count INTEGER NOT NULL,
+                    PRIMARY KEY (key_id, model)
+                )
+            """)
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def limit_for(self, api_key, model_name):
+        """Model limit with this key's overrides applied ("*" first, then the model's own)."""
+        limit = dict(self.limits.get(model_name, self.default_limit))
+        overrides = self.key_limits.get(key_id(api_key)) or {}
+        limit.update(overrides.get("*") or {})
+        limit.update(overrides.get(model_name) or {})
+        return limit
+
+    def _load(self, conn, kid, model_name, limit, now):
+        """Current bucket state refilled up to `now`: (requests, tokens, day_count)."""
+        row = conn.execute(
+            "SELECT requests, tokens, updated_at, day, day_count FROM buckets WHERE key_id = ? AND model = ?",
+            (kid, model_name),
+        ).fetchone()
+        if not row:
+            return float(limit["rpm"]), float(limit["tpm"]), 0
+        requests, tokens, updated_at, day, day_count = row
+        elapsed = max(0.0, now - updated_at)
+        requests = min(limit["rpm"], requests + elapsed * limit["rpm"] / 60.0)
+        tokens = min(limit["tpm"], tokens + elapsed * limit["tpm"] / 60.0)
+        return requests, tokens, (day_count if day == _today() else 0)
+
+    def _store(self, conn, kid, model_name, requests, tokens, day_count, now):
+        conn.execute(
+            "INSERT OR REPLACE INTO buckets (key_id, model, requests, tokens, updated_at, day, day_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kid, model_name, requests, tokens, now, _today(), day_count),
+        )
+
+    def reserve(self, api_key, model_name, tokens):
+        """
+        Tries to take 1 request + `tokens` from the buckets.
+        Returns (wait_seconds, reason): (0, None) when reserved; (seconds, None) when the
+        minute buckets are short; (None, message) when today's request quota is used up.
+        """
+        limit = self.limit_for(api_key, model_name)
+        tokens = min(tokens, limit["tpm"])  # A single oversized call can still go through a full bucket
+        kid = key_id(api_key)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                requests, available_tokens, day_count = self._load(conn, kid, model_name, limit, now)
+                if day_count >= limit["rpd"]:
+                    conn.rollback()
+                    return None, f"{model_name} 모델의 오늘 요청 한도({limit['rpd']}회)를 모두 사용했습니다."
+
+                wait = 0.0
+                if requests < 1:
+                    wait = max(wait, (1 - requests) * 60.0 / limit["rpm"])
+                if available_tokens < tokens:
+                    wait = max(wait, (tokens - available_tokens) * 60.0 / limit["tpm"])
+                if wait > 0:
+                    conn.rollback()
+                    return wait, None
+
+                self._store(conn, kid, model_name, requests - 1, available_tokens - tokens, day_count + 1, now)
+                conn.commit()
+                return 0, None
+            finally:
+                conn.close()
+
+    def acquire(self, api_key, model_name, tokens, max_wait=None):
+        """
+        Blocks until the call may be sent. Returns (True, None), or (False, reason) when
+        the wait would exceed `max_wait` seconds or the daily quota is exhausted.
+        """
+        max_wait = config.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        deadline = time.time() + max_wait
+        while True:
+            try:
+                wait, reason = self.reserve(api_key, model_name, tokens)
+            except sqlite3.Error as e:
+                print(f"Rate limiter unavailable, sending anyway: {e}")
+                return True, None
+            if wait == 0:
+                return True, None
+            if wait is None:
+                return False, reason
+            if time.time() + wait > deadline:
+                return False, f"{model_name} 모델의 분당 한도에 도달했습니다. 약 {int(wait) + 1}초 후 다시 시도해 주세요."
+            time.sleep(wait)
+
+    def record_usage(self, api_key, model_name, reserved_tokens, actual_tokens):
+        """Corrects the token bucket once the real usage (usage_metadata) is known."""
+        if actual_tokens is None:
+            return
+        limit = self.limit_for(api_key, model_name)
+        kid = key_id(api_key)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    requests, tokens, day_count = self._load(conn, kid, model_name, limit, now)
+                    tokens = min(limit["tpm"], tokens + min(reserved_tokens, limit["tpm"]) - actual_tokens)
+                    self._store(conn, kid, model_name, requests, tokens, day_count, now)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Rate limiter update failed: {e}")
+
+    def remaining(self, api_key, model_name):
+        """Returns {"rpm", "tpm", "rpd"} left right now (for display)."""
+        limit = self.limit_for(api_key, model_name)
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    requests, tokens, day_count = self._load(conn, key_id(api_key), model_name, limit, time.time())
+                finally:
+                    conn.close()
+        except sqlite3.Error:
+            return {"rpm": limit["rpm"], "tpm": limit["tpm"], "rpd": limit["rpd"]}
+        return {"rpm": int(requests), "tpm": int(max(0, tokens)), "rpd": max(0, limit["rpd"] - day_count)}
+
+
+# Shared by every ContentGenerator in the process
+RATE_LIMITER = RateLimiter()
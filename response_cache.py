@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_DIR = ".cache"
+DEFAULT_PATH = os.path.join(CACHE_DIR, "responses.sqlite")
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for Gemini responses (SQLite).
+    Keys are a SHA-256 of (model, full prompt, generation_config, is_json).
+    Entries expire after `ttl` seconds; when the stored text exceeds `max_bytes`
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=7 * 24 * 3600, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    body TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def make_key(model_name, prompt, generation_config=None, is_json=True, system_instruction=None):
+        parts = [model_name, prompt, generation_config or {}, bool(is_json)]
+        if system_instruction:
+            parts.append(system_instruction)
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached response text, or None on a miss/expired entry."""
+        now = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute("SELECT body, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                    if row and now - row[1] <= self.ttl:
+                        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        conn.commit()
+                        self.hits += 1
+                        return row[0]
+                    if row:
+                        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        conn.commit()
+                    self.misses += 1
+                    return None
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Response cache read failed: {e}")
+            return None
+
+    def put(self, key, model_name, body):
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, model, body, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, model_name, body, size, now, now)
+                    )
+                    self._evict(conn, now)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Response cache write failed: {e}")
+
+    def _evict(self, conn, now):
+        # 1. Expired entries
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        # 2. Least recently used entries until under the size budget
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM responses")
+                    conn.commit()
+                finally:
+                    conn.close()
+                self.hits = 0
+                self.misses = 0
+        except sqlite3.Error as e:
+            print(f"Response cache clear failed: {e}")
+
+    def stats(self):
+        """Returns hit/miss counters (this process) and on-disk entry count/size."""
+        entries, size = 0, 0
+        if os.path.exists(self.path):
+            try:
+                with self._lock:
+                    conn = self._connect()
+                    try:
+                        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+                    finally:
+                        conn.close()
+            except sqlite3.Error:
+                pass
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+# Shared by every ContentGenerator in the process
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,145 @@
+import concurrent.futures
+import email.utils
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.path.join(".cache", "stock")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class StockImageCache:
+    """
+    Local content cache for stock photos (.cache/stock).
+    - fresh entries (younger than max_age) are served from disk with no network call
+    - stale entries are revalidated with If-None-Match / If-Modified-Since (304 = reuse)
+    - on network errors any cached copy is served, so downloads keep working offline
+    - URLs that failed with nothing cached are not retried for `failure_ttl` seconds
+    All requests share one pooled requests.Session.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_age=7 * 24 * 3600, timeout=15, failure_ttl=300):
+        self.directory = directory
+        self.max_age = max_age
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self._failures = {}  # {url: retry_after}
+        self._failures_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _paths(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return base + ".jpg", base + ".json"
+
+    def _read(self, url):
+        data_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(data_path, "rb") as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_file(self, path, payload, mode):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def _store(self, url, data, meta):
+        data_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if data is not None:
+                self._write_file(data_path, data, "wb")
+            self._write_file(meta_path, json.dumps(meta), "w")
+        except OSError as e:
+            print(f"Stock cache write failed: {e}")
+
+    def fetch(self, url, revalidate=False):
+        """Returns the image bytes for `url` (from disk when possible), or None."""
+        data, meta = self._read(url)
+        if data is not None and not revalidate and time.time() - meta.get("fetched_at", 0) < self.max_age:
+            return data
+        if data is None and not revalidate:
+            with self._failures_lock:
+                if self._failures.get(url, 0) > time.time():
+                    return None
+
+        headers = {}
+        if data is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+        except requests.RequestException as e:
+            print(f"Stock fetch failed ({url}): {e}")
+            if data is None:
+                self._remember_failure(url)
+            return data  # Offline: serve whatever we have
+
+        if response.status_code == 304 and data is not None:
+            meta["fetched_at"] = time.time()
+            self._store(url, None, meta)
+            return data
+
+        if response.status_code == 200 and response.content:
+            self._store(url, response.content, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified") or email.utils.formatdate(usegmt=True),
+                "fetched_at": time.time(),
+            })
+            return response.content
+
+        print(f"Stock fetch returned {response.status_code} ({url})")
+        if data is None:
+            self._remember_failure(url)
+        return data
+
+    def _remember_failure(self, url):
+        with self._failures_lock:
+            self._failures[url] = time.time() + self.failure_ttl
+
+    def prefetch(self, urls, max_workers=4):
+        """Warms the cache for every URL. Returns {url: True/False}."""
+        urls = list(dict.fromkeys(urls))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lambda u: self.fetch(u) is not None, urls))
+        return dict(zip(urls, results))
+
+
+# Shared by the whole process
+STOCK_CACHE = StockImageCache()
+
+
+if __name__ == "__main__":
+    # python stock_cache.py prefetch  -> downloads every curated photo into the local cache
+    if len(sys.argv) < 2 or sys.argv[1] != "prefetch":
+        print("Usage: python stock_cache.py prefetch")
+        sys.exit(1)
+
+    from image_generator import ImageGenerator
+    curated_urls = [ImageGenerator.stock_url(photo_id) for photo_id in ImageGenerator.CURATED_STOCK.values()]
+    results = STOCK_CACHE.prefetch(curated_urls)
+    ok = sum(1 for success in results.values() if success)
+    for url, success in results.items():
+        if not success:
+            print(f"FAILED: {url}")
+    print(f"Prefetched {ok} / {len(results)} curated stock images into {STOCK_CACHE.directory}")
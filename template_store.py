@@ -0,0 +1,272 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+TEMPLATES_FILE = "custom_templates.json"
+
+
+class FileLock:
+    """
+    Portable inter-process lock: a lock file created with O_CREAT | O_EXCL.
+    A lock older than `stale` seconds is assumed abandoned (crashed process) and broken.
+    """
+
+    def __init__(self, path, timeout=5.0, stale=30.0):
+        self.path = path
+        self.timeout = timeout
+        self.stale = stale
+
+    def acquire(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode("ascii"))
+                os.close(fd)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue  # Released meanwhile
+                if time.time() > deadline:
+                    raise TimeoutError(f"Could not lock {self.path}")
+                time.sleep(0.05)
+
+    def release(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def atomic_write_json(path, data):
+    """Writes JSON to a temp file in the same directory and renames it over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class TemplateStore:
+    """
+    Local custom-template store (custom_templates.json) shared by all sessions of the process.
+    - edits land in memory immediately; rapid edits are coalesced and flushed to disk
+      after `debounce` seconds, under a file lock, as an atomic temp-file + rename
+    - each flush re-reads the file and applies only our pending changes, so edits made
+      by other processes are not overwritten
+    - remote sync (`remote.apply_changes`) is write-behind: a background thread sends the
+      coalesced changes and retries with exponential backoff, never blocking the UI
+    """
+
+    def __init__(self, path=TEMPLATES_FILE, remote=None, debounce=0.5, max_attempts=5):
+        self.path = path
+        self.remote = remote
+        self.debounce = debounce
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(path + ".lock")
+        self._data = {}
+        self._mtime = None
+        self._revision = 0
+        self._pending_local = {}   # {name: prompt or None (delete)}
+        self._pending_remote = {}
+        self._inflight_remote = {}  # Batch being sent right now
+        self._timer = None
+        self._remote_wakeup = threading.Event()
+        self._remote_thread = None
+
+    # -- reading -------------------------------------------------------------
+
+    def _read_file(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _refresh(self):
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        with self._lock:
+            if mtime != self._mtime:
+                self._data = self._read_file()
+                self._mtime = mtime
+                self._revision += 1
+
+    @property
+    def revision(self):
+        """Changes whenever load() would return something different (one stat call)."""
+        self._refresh()
+        return self._revision
+
+    def load(self):
+        """Returns {name: prompt}: the file (re-read only when its mtime changed) plus unflushed edits."""
+        self._refresh()
+        with self._lock:
+            merged = dict(self._data)
+            _apply(merged, self._pending_local)
+            return merged
+
+    # -- writing -------------------------------------------------------------
+
+    def set(self, name, prompt):
+        self._change({name: prompt})
+
+    def delete(self, name):
+        self._change({name: None})
+
+    def _change(self, changes, sync_remote=True):
+        with self._lock:
+            self._pending_local.update(changes)
+            self._revision += 1
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+            if sync_remote and self.remote is not None:
+                self._pending_remote.update(changes)
+                self._ensure_remote_worker()
+                self._remote_wakeup.set()
+
+    def flush(self):
+        """Writes pending local edits to disk now. Returns True on success."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending_local:
+                return True
+            pending = dict(self._pending_local)
+            try:
+                with self._file_lock:
+                    data = self._read_file()
+                    _apply(data, pending)
+                    atomic_write_json(self.path, data)
+                    self._mtime = os.path.getmtime(self.path)
+                self._data = data
+                self._pending_local.clear()
+                return True
+            except (OSError, TimeoutError) as e:
+                print(f"Failed to write {self.path}: {e}")
+                return False
+
+    def apply_remote(self, delta, only_missing=False):
+        """
+        Mirrors changes that came from the cloud (snapshot listener) into the local file
+        without queueing them back to the cloud.
+        """
+        if only_missing:
+            current = self.load()
+            delta = {name: prompt for name, prompt in delta.items() if prompt is not None and name not in current}
+        if delta:
+            self._change(delta, sync_remote=False)
+            self.flush()
+
+    # -- write-behind remote queue ---------------------------------------------
+
+    def _ensure_remote_worker(self):
+        if self._remote_thread is None or not self._remote_thread.is_alive():
+            self._remote_thread = threading.Thread(target=self._remote_loop, name="template-sync", daemon=True)
+            self._remote_thread.start()
+
+    def _remote_loop(self):
+        attempts = 0
+        while True:
+            self._remote_wakeup.wait()
+            time.sleep(self.debounce)  # Let rapid edits coalesce into one batch
+            with self._lock:
+                self._remote_wakeup.clear()
+                batch = self._pending_remote
+                self._pending_remote = {}
+                self._inflight_remote = batch
+                remote = self.remote
+            if not batch or remote is None:
+                continue
+
+            ok = False
+            try:
+                ok = remote.apply_changes(batch)
+            except Exception as e:
+                print(f"Template sync error: {e}")
+            with self._lock:
+                self._inflight_remote = {}
+
+            if ok:
+                attempts = 0
+                continue
+
+            attempts += 1
+            if attempts >= self.max_attempts:
+                print(f"Template sync gave up after {attempts} attempts: {sorted(batch)}")
+                attempts = 0
+                continue
+            with self._lock:
+                # Newer edits made meanwhile take precedence over the failed batch
+                self._pending_remote = {**batch, **self._pending_remote}
+                self._remote_wakeup.set()
+            time.sleep(min(60, 2 ** attempts))
+
+    def pending_remote(self):
+        with self._lock:
+            return len(self._pending_remote)
+
+    def pending_deletes(self):
+        """
+        Names deleted locally whose cloud delete is not committed yet (queued or in flight).
+        The cloud cache still lists them until then, so merges must not bring them back.
+        """
+        with self._lock:
+            changes = {**self._inflight_remote, **self._pending_remote}
+            return {name for name, prompt in changes.items() if prompt is None}
+
+
+def _apply(data, changes):
+    for name, prompt in changes.items():
+        if prompt is None:
+            data.pop(name, None)
+        else:
+            data[name] = prompt
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(path=TEMPLATES_FILE, remote=None):
+    """Process-wide store per file; `remote` (e.g. FirebaseSync) is attached when given."""
+    key = os.path.abspath(path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = TemplateStore(path)
+            _STORES[key] = store
+        if remote is not None:
+            store.remote = remote
+        return store
+
+
+@atexit.register
+def _flush_all():
+    for store in list(_STORES.values()):
+        store.flush()
@@ -1,3 +1,6 @@
+import functools
+import re
+
 # Template 1: Basic Profit-Focused Rules (Step 311)
 TEMPLATE_BASIC = """
 당신은 "티스토리 수익형 블로그 글쓰기 전문가"입니다.
@@ -179,3 +182,77 @@ TEMPLATE_HTML = """
     "image_keywords": "2-3 specific English keywords describing the topic (e.g., 'fitness,workout' or 'travel,seoul')"
 }}
 """
+
+
+_TOKEN_RE = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class CompiledTemplate:
+    """
+    A prompt template parsed once into literal chunks and placeholder slots.
+    - `{name}` is a placeholder
+    - with unescape_braces, `{{` / `}}` become `{` / `}` (built-in templates only; saved custom
+      templates were always sent with `{{` as typed, so they keep that)
+    - any other brace (e.g. CSS or JSON typed into a custom template) stays literal
+    render() just joins the precomputed chunks with the values (no re-scanning, no str.replace).
+    """
+
+    def __init__(self, source, fields=("topic",), unescape_braces=False):
+        self.source = source
+        self.fields = tuple(fields)
+        self.unescape_braces = unescape_braces
+        self.chunks = []        # literal text between placeholders (len = len(placeholders) + 1)
+        self.placeholders = []  # placeholder names in order
+        self.offsets = []       # offset of each placeholder in `source`
+        self.unknown = []       # {names} not in `fields`, kept as literal text
+
+        literal = []
+        position = 0
+        for match in (_TOKEN_RE if unescape_braces else _PLACEHOLDER_RE).finditer(source):
+            literal.append(source[position:match.start()])
+            token = match.group(0)
+            name = match.group(1)
+            if token in ("{{", "}}"):
+                literal.append(token[0])
+            elif name in self.fields:
+                self.chunks.append("".join(literal))
+                self.placeholders.append(name)
+                self.offsets.append(match.start())
+                literal = []
+            else:
+                self.unknown.append(name)
+                literal.append(token)
+            position = match.end()
+        literal.append(source[position:])
+        self.chunks.append("".join(literal))
+
+    def problems(self, required=("topic",)):
+        """Validation messages (empty when the template is usable)."""
+        messages = [f"{{{name}}} 자리표시자가 없습니다." for name in required if name not in self.placeholders]
+        messages += [f"알 수 없는 자리표시자 {{{name}}} 는 그대로 전달됩니다." for name in dict.fromkeys(self.unknown)]
+        return messages
+
+    def render(self, **values):
+        parts = [self.chunks[0]]
+        for name, chunk in zip(self.placeholders, self.chunks[1:]):
+            parts.append(values[name])
+            parts.append(chunk)
+        return "".join(parts)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_template(source):
+    """Compiled form of a template text, cached (custom templates are compiled once per version)."""
+    return CompiledTemplate(source, unescape_braces=source in (TEMPLATE_BASIC, TEMPLATE_HTML))
+
+
+def _validate_builtin_templates():
+    """Built-in templates are checked at import time, so a broken edit fails fast."""
+    for name in ("TEMPLATE_BASIC", "TEMPLATE_HTML"):
+        problems = compile_template(globals()[name]).problems()
+        if problems:
+            raise ValueError(f"{name}: {' '.join(problems)}")
+
+
+_validate_builtin_templates()
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import threading
+import time
+import zipfile
+
+import pytest
+
+# batch_generator imports the generators, which need the Gemini SDK and Pillow
+pytest.importorskip("google.generativeai")
+pytest.importorskip("PIL")
+
+import batch_generator  # noqa: E402
+from batch_generator import BatchGenerator, build_bundle, parse_topics  # noqa: E402
+
+
+def test_parse_topics_merges_text_and_csv():
+    csv_bytes = "﻿주제,비고\n커피 추천,x\n\n다이어트 식단\n커피 추천\n".encode("utf-8")
+    assert parse_topics("  여행 준비 \n\n커피 추천\n", csv_bytes) == ["여행 준비", "커피 추천", "다이어트 식단"]
+
+
+def test_parse_topics_skips_english_header_and_blank_cells():
+    assert parse_topics(csv_bytes=b"topic\n,empty\nsleep tips\n") == ["sleep tips"]
+    assert parse_topics() == []
+
+
+class FakeContentGenerator:
+    def __init__(self, api_key=None, selected_model=None):
+        self.lock = threading.Lock()
+
+    def generate_blog_post(self, topic, prompt_template, use_cache=True, use_context_cache=False):
+        if topic == "boom":
+            raise RuntimeError("연결 실패")
+        if topic == "empty":
+            return None, "할당량 초과"
+        time.sleep(0.05 if topic == "slow" else 0)
+        return {"title": f"{topic} 제목", "content": f"<p>{topic}</p>"}, None
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(batch_generator, "ContentGenerator", FakeContentGenerator)
+    return BatchGenerator(max_workers=3, with_thumbnail=False)
+
+
+def test_run_keeps_topic_order_and_reports_progress(generator):
+    progress = []
+    topics = ["slow", "fast", "empty"]
+    results = generator.run(topics, "{topic}", on_progress=lambda done, total, result: progress.append((done, total)))
+    assert [r["topic"] for r in results] == topics
+    assert results[0]["blog_data"]["title"] == "slow 제목"
+    assert (results[2]["blog_data"], results[2]["error"]) == (None, "할당량 초과")
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_run_captures_exceptions_per_topic(generator):
+    results = generator.run(["ok", "boom"], "{topic}")
+    assert results[0]["error"] is None
+    assert (results[1]["topic"], results[1]["blog_data"], results[1]["error"]) == ("boom", None, "연결 실패")
+    assert generator.run([], "{topic}") == []
+
+
+class FakeThumbnail:
+    data = b"\xff\xd8jpeg"
+
+
+def test_build_bundle_layout():
+    results = [
+        {"topic": "커피 추천", "blog_data": {"title": "커피", "content": "<p>본문</p>", "tags": ["a"]}, "image_path": FakeThumbnail(), "error": None},
+        {"topic": "실패/주제", "blog_data": None, "image_path": None, "error": "할당량 초과"},
+    ]
+    with zipfile.ZipFile(io.BytesIO(build_bundle(results))) as zf:
+        assert sorted(zf.namelist()) == [
+            "01_커피_추천/meta.json", "01_커피_추천/post.html", "01_커피_추천/thumbnail.jpg", "index.csv",
+        ]
+        assert zf.read("01_커피_추천/post.html").decode("utf-8") == "<p>본문</p>"
+        assert zf.read("01_커피_추천/thumbnail.jpg") == FakeThumbnail.data
+        meta = json.loads(zf.read("01_커피_추천/meta.json"))
+        assert (meta["topic"], meta["title"], meta["tags"]) == ("커피 추천", "커피", ["a"])
+        assert "content" not in meta
+
+        index = zf.read("index.csv").decode("utf-8")
+        assert index.startswith("﻿")
+        rows = list(csv.reader(io.StringIO(index.lstrip("﻿"))))
+        assert rows[0] == ["no", "topic", "status", "title", "folder", "error"]
+        assert rows[1] == ["1", "커피 추천", "ok", "커피", "01_커피_추천", ""]
+        assert rows[2] == ["2", "실패/주제", "failed", "", "", "할당량 초과"]
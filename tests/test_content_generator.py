@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("dotenv")  # config
+
+import content_generator  # noqa: E402
+from content_generator import ContentGenerator, _body_lost  # noqa: E402
+from context_cache import ContextCacheManager  # noqa: E402
+from model_health import ModelHealthTracker  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from test_context_cache import FakeBackend  # noqa: E402
+
+COMPLETE = '{"title": "t", "content": "<p>본문</p>", "tags": ["a", "b"]}'
+MISSING_BRACE = '{"title": "t", "content": "<p>본문</p>", "tags": ["a", "b"], "image_keywords": "x"'
+CUT_IN_TAGS = '{"title": "t", "content": "<p>본문</p>", "tags": ["a", "b'
+CUT_IN_BODY = '{"title": "t", "content": "<p>본'
+
+
+class FakeResponse:
+    prompt_feedback = None
+
+    def __init__(self, text):
+        self.text = text
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.setattr(content_generator, "RESPONSE_CACHE", ResponseCache(path=str(tmp_path / "responses.sqlite")))
+    monkeypatch.setattr(content_generator, "HEALTH", ModelHealthTracker())
+    gen = ContentGenerator(api_key="test-key", selected_model="m1")
+    gen.key_pool.order_models = lambda primary, models: ["m1", "m2"]
+    return gen
+
+
+def serve(generator, texts):
+    """Makes each model call return the next text; returns the list of models called."""
+    calls = []
+
+    def open_response(model_name, *args, **kwargs):
+        calls.append(model_name)
+        return FakeResponse(texts[len(calls) - 1]), "test-key", time.time(), None
+
+    generator._open_response = open_response
+    return calls
+
+
+def test_body_lost():
+    assert not _body_lost({"content": "x"}, [])
+    assert not _body_lost({"content": "x", "tags": ["a"]}, ["truncated"])
+    assert _body_lost({"title": "t", "content": "<p>본"}, ["truncated"])
+    assert _body_lost({"title": "t"}, ["truncated"])
+    assert not _body_lost({"title": "t"}, ["missing_closer"])
+
+
+def test_complete_response_is_cached(generator):
+    calls = serve(generator, [COMPLETE])
+    data, repairs, error = generator._generate("p")
+    assert (data["content"], repairs, error, calls) == ("<p>본문</p>", [], None, ["m1"])
+    serve(generator, [])
+    assert generator._generate("p")[0] == data  # Served from the cache, no model call
+
+
+@pytest.mark.parametrize("text, repair", [(MISSING_BRACE, "missing_closer"), (CUT_IN_TAGS, "truncated")])
+def test_recoverable_cut_off_is_used_once_and_not_cached(generator, text, repair):
+    calls = serve(generator, [text, COMPLETE])
+    data, repairs, error = generator._generate("p")
+    assert calls == ["m1"]
+    assert data["content"] == "<p>본문</p>"
+    assert repairs == [repair]
+    calls = serve(generator, [COMPLETE])
+    generator._generate("p")
+    assert calls == ["m1"]  # Not served from the cache
+
+
+def test_lost_body_tries_the_next_model(generator):
+    calls = serve(generator, [CUT_IN_BODY, COMPLETE])
+    data, repairs, error = generator._generate("p")
+    assert calls == ["m1", "m2"]
+    assert (data["content"], repairs) == ("<p>본문</p>", [])
+
+
+def test_lost_body_is_returned_when_nothing_better_comes(generator):
+    calls = serve(generator, [CUT_IN_BODY, CUT_IN_BODY])
+    data, repairs, error = generator._generate("p")
+    assert calls == ["m1", "m2"]
+    assert (data["content"], repairs, error) == ("<p>본", ["truncated"], None)
+
+
+def test_failed_cached_call_resends_the_full_prompt(generator, monkeypatch):
+    sent = []
+
+    class FakeModel:
+        def __init__(self, system_instruction, cached_content):
+            self.system_instruction = system_instruction
+            self.cached_content = cached_content
+
+        def generate_content(self, prompt, generation_config=None, stream=False):
+            sent.append((self.cached_content, self.system_instruction, prompt))
+            if self.cached_content:
+                raise RuntimeError("400 CachedContent has expired")
+            return FakeResponse(COMPLETE)
+
+    monkeypatch.setattr(content_generator, "get_model",
+                        lambda api_key, model_name, safety_settings, system_instruction=None, cached_content=None: FakeModel(system_instruction, cached_content))
+    monkeypatch.setattr(content_generator.RATE_LIMITER, "acquire", lambda *args, **kwargs: (True, None))
+    generator.key_pool.candidates = lambda model_name: ["test-key"]
+    generator.context_cache = ContextCacheManager(FakeBackend())
+
+    response, api_key, started, error = generator._open_response(
+        "m1", "prefix + topic", None, 100, system_instruction="system", cached_prompt=("prefix + ", "topic"))
+    assert (response.text, api_key, error) == (COMPLETE, "test-key", None)
+    assert sent == [("cachedContents/1", None, "topic"), (None, "system", "prefix + topic")]
+    # The rejected handle was dropped: the next request creates a new one
+    assert generator.context_cache.get("test-key", "m1", "system", "prefix + ") == "cachedContents/2"
@@ -0,0 +1,93 @@
+import pytest
+
+import context_cache
+from context_cache import FAILURE_BACKOFF, ContextCacheBackend, ContextCacheManager
+
+
+class FakeBackend(ContextCacheBackend):
+    """Records calls instead of talking to the server; fail_create makes create() raise."""
+
+    def __init__(self, fail_create=False):
+        self.fail_create = fail_create
+        self.created = []
+        self.refreshed = []
+        self.deleted = []
+
+    def create(self, api_key, model_name, system_instruction, prefix, ttl):
+        if self.fail_create:
+            raise RuntimeError("Cached content is too small")
+        self.created.append((api_key, model_name, prefix))
+        return f"cachedContents/{len(self.created)}"
+
+    def refresh(self, api_key, name, ttl):
+        self.refreshed.append(name)
+
+    def delete(self, api_key, name):
+        self.deleted.append(name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(context_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_one_create_per_prefix(clock):
+    backend = FakeBackend()
+    manager = ContextCacheManager(backend, ttl=600, refresh_margin=60)
+    first = manager.get("key", "m1", "system", "prefix A")
+    assert manager.get("key", "m1", "system", "prefix A") == first
+    second = manager.get("key", "m1", "system", "prefix B")
+    other_key = manager.get("other", "m1", "system", "prefix A")
+    assert len({first, second, other_key}) == 3
+    assert [prefix for _, _, prefix in backend.created] == ["prefix A", "prefix B", "prefix A"]
+
+
+def test_refreshes_inside_margin(clock):
+    backend = FakeBackend()
+    manager = ContextCacheManager(backend, ttl=600, refresh_margin=60)
+    name = manager.get("key", "m1", "system", "prefix")
+    clock[0] += 500  # 100s left: still outside the margin
+    assert manager.get("key", "m1", "system", "prefix") == name
+    assert backend.refreshed == []
+    clock[0] += 50   # 50s left: extended in place
+    assert manager.get("key", "m1", "system", "prefix") == name
+    assert backend.refreshed == [name]
+    assert len(backend.created) == 1
+    clock[0] += 599  # The refresh pushed expiry out by a full ttl
+    assert manager.get("key", "m1", "system", "prefix") == name
+    assert len(backend.created) == 1
+
+
+def test_expired_handle_is_recreated(clock):
+    backend = FakeBackend()
+    manager = ContextCacheManager(backend, ttl=600, refresh_margin=60)
+    name = manager.get("key", "m1", "system", "prefix")
+    clock[0] += 601
+    assert manager.get("key", "m1", "system", "prefix") != name
+    assert backend.refreshed == []
+    assert len(backend.created) == 2
+
+
+def test_failed_create_backs_off(clock):
+    backend = FakeBackend(fail_create=True)
+    manager = ContextCacheManager(backend, ttl=600, refresh_margin=60)
+    assert manager.get("key", "m1", "system", "prefix") is None
+    backend.fail_create = False
+    clock[0] += FAILURE_BACKOFF - 1
+    assert manager.get("key", "m1", "system", "prefix") is None
+    assert backend.created == []
+    clock[0] += 1
+    assert manager.get("key", "m1", "system", "prefix") == "cachedContents/1"
+
+
+def test_invalidate_forgets_the_handle(clock):
+    backend = FakeBackend()
+    manager = ContextCacheManager(backend, ttl=600, refresh_margin=60)
+    name = manager.get("key", "m1", "system", "prefix")
+    other = manager.get("key", "m1", "system", "other prefix")
+    manager.invalidate(name)
+    assert manager.get("key", "m1", "system", "prefix") != name
+    assert manager.get("key", "m1", "system", "other prefix") == other
+    assert len(backend.created) == 3
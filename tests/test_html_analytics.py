@@ -0,0 +1,49 @@
+from html_analytics import analyze_html, check_length
+
+POST = (
+    '<p>도입 문단 &amp; 소개</p>'
+    '<h2>첫 섹션</h2><p>본문 <a href="https://example.com">링크</a> <a href="/local">내부</a></p>'
+    '<ins class="adsbygoogle"></ins><script>(adsbygoogle = window.adsbygoogle || []).push({});</script>'
+    '<h3>하위 섹션</h3><p>내용</p><img src="a.jpg">'
+    '<script type="application/ld+json">{"@context": "https://schema.org", "@type": "FAQPage", "mainEntity": []}</script>'
+    '<style>p { color: red; }</style>'
+)
+
+
+def test_counts_ignore_markup_scripts_and_styles():
+    analysis = analyze_html(POST)
+    assert analysis["korean_only"] == len("도입문단소개첫섹션본문링크내부하위섹션내용")
+    assert analysis["total_no_spaces"] == analysis["korean_only"] + 1  # "&"
+
+
+def test_structure():
+    analysis = analyze_html(POST)
+    assert analysis["outline"] == [(2, "첫 섹션"), (3, "하위 섹션")]
+    assert [s["heading"] for s in analysis["sections"]] == [None, "첫 섹션", "하위 섹션"]
+    assert analysis["sections"][1]["korean"] == len("첫섹션본문링크내부")
+    assert (analysis["links"], analysis["external_links"]) == (2, 1)
+    assert (analysis["images"], analysis["ad_slots"]) == (1, 1)
+    assert analysis["faq_schema"] is True
+
+
+def test_ad_markers_count_as_slots_not_text():
+    html = (
+        '<p>첫 문단</p><p data-ke-size="size16">ㄱ</p><p>둘째 문단</p>'
+        '<div class="adsense-fixed"></div><p>ㄱ은 자음입니다</p>'
+    )
+    analysis = analyze_html(html)
+    assert analysis["ad_slots"] == 2
+    assert analysis["korean_only"] == len("첫문단둘째문단ㄱ은자음입니다")
+
+
+def test_results_are_memoized_by_content():
+    assert analyze_html(POST) is analyze_html(POST)
+    assert analyze_html("<p>다른 글</p>") is not analyze_html(POST)
+
+
+def test_check_length():
+    assert check_length("<p>" + "가" * 1800 + "</p>") == (True, None)
+    ok, message = check_length("<p>" + "가" * 100 + "</p>")
+    assert not ok and "1500자 짧습니다" in message
+    ok, message = check_length("<p>" + "가" * 2100 + "</p>")
+    assert not ok and "100자 깁니다" in message
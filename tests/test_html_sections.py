@@ -0,0 +1,31 @@
+from html_sections import MaskedSection, split_sections
+
+HTML = '<p>도입 문단입니다.</p><h2>첫 섹션</h2><p>본문 A</p><h3>하위</h3><p>본문 B</p>'
+
+
+def test_split_sections_round_trips():
+    sections = split_sections(HTML)
+    assert "".join(sections) == HTML
+    assert [s[:4] for s in sections] == ["<p>도", "<h2>", "<h3>"]
+    assert split_sections("") == []
+
+
+def test_masked_section_skips_scripts_and_markers():
+    section = MaskedSection('<p>첫 문장입니다.</p><script>var 가나 = 1;</script><p>ㄱ</p><p>&nbsp;</p>')
+    assert section.texts == ["첫 문장입니다."]
+
+
+def test_patch_keeps_whitespace_and_counts_changes():
+    section = MaskedSection("<p>  원래 문장  </p><p>그대로 둔 문장</p>")
+    html, changed = section.patch(["바뀐 문장", "그대로 둔 문장"])
+    assert html == "<p>  바뀐 문장  </p><p>그대로 둔 문장</p>"
+    assert changed == 1
+
+
+def test_patch_escapes_model_text():
+    section = MaskedSection("<p>A &amp; B 비교</p>")
+    assert section.texts == ["A & B 비교"]
+    html, changed = section.patch(["A < B 비교"])
+    assert html == "<p>A &lt; B 비교</p>"
+    assert changed == 1
+    assert section.patch(["A & B 비교"]) == ("<p>A &amp; B 비교</p>", 0)
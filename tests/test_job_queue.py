@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from job_queue import DONE, FAILED, JobQueue
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(path=str(tmp_path / "jobs.sqlite"), **kwargs)
+
+
+def test_job_runs_with_in_memory_secrets(tmp_path):
+    queue = make_queue(tmp_path, workers=1)
+    queue.register("echo", lambda payload, secrets: ({"topic": payload["topic"], "has_key": secrets.get("api_key") == "secret-key"}, None))
+    queue.start()
+    job = wait_for(queue, queue.submit("echo", {"topic": "커피"}, secrets={"api_key": "secret-key"}))
+    assert job["status"] == DONE
+    assert job["result"] == {"topic": "커피", "has_key": True}
+    with open(queue.path, "rb") as f:
+        assert b"secret-key" not in f.read()
+
+
+def test_failed_attempts_are_retried(tmp_path):
+    calls = []
+
+    def flaky(payload, secrets):
+        calls.append(1)
+        return (None, "일시 오류") if len(calls) == 1 else ("ok", None)
+
+    queue = make_queue(tmp_path, workers=1, max_attempts=2)
+    queue.register("flaky", flaky)
+    queue.start()
+    job = wait_for(queue, queue.submit("flaky", {}))
+    assert (job["status"], job["attempts"], job["result"]) == (DONE, 2, "ok")
+
+
+def test_exceptions_fail_the_job(tmp_path):
+    def broken(payload, secrets):
+        raise RuntimeError("boom")
+
+    queue = make_queue(tmp_path, workers=1, max_attempts=1)
+    queue.register("broken", broken)
+    queue.start()
+    job = wait_for(queue, queue.submit("broken", {}))
+    assert (job["status"], job["error"]) == (FAILED, "boom")
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        make_queue(tmp_path).submit("nope", {})
+
+
+def test_running_jobs_are_taken_over_only_when_stale(tmp_path):
+    first = make_queue(tmp_path, stale_after=60)
+    first.owner = "host:1"
+    first.register("k", lambda payload, secrets: (None, None))
+    job_id = first.submit("k", {})
+    assert first._claim()[0] == job_id
+
+    second = make_queue(tmp_path, stale_after=60)
+    second.owner = "host:2"
+    assert second._claim() is None  # Owner is still heartbeating
+
+    second.stale_after = 0
+    time.sleep(0.01)
+    assert second._claim()[0] == job_id
+
+
+def test_position_counts_jobs_ahead(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.register("k", lambda payload, secrets: (None, None))
+    first = queue.submit("k", {})
+    time.sleep(0.01)
+    second = queue.submit("k", {})
+    assert queue.position(first) == 0
+    assert queue.position(second) == 1
+
+
+def test_owner_is_unique_per_instance(tmp_path):
+    assert make_queue(tmp_path).owner != make_queue(tmp_path).owner
+
+
+def test_stale_jobs_out_of_attempts_are_failed(tmp_path):
+    crashed = make_queue(tmp_path, max_attempts=1)
+    crashed.register("k", lambda payload, secrets: (None, None))
+    job_id = crashed.submit("k", {})
+    assert crashed._claim()[0] == job_id  # Attempt 1, then the process dies
+
+    survivor = make_queue(tmp_path, max_attempts=1, stale_after=0)
+    time.sleep(0.01)
+    assert survivor._claim() is None
+    job = survivor.get(job_id)
+    assert job["status"] == FAILED
+    assert "최대 시도 횟수" in job["error"]
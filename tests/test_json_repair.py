@@ -0,0 +1,60 @@
+import pytest
+
+from json_repair import parse_model_json
+
+
+def test_clean_json_needs_no_repairs():
+    data, repairs = parse_model_json('{"title": "제목", "tags": ["a", "b"]}')
+    assert data == {"title": "제목", "tags": ["a", "b"]}
+    assert repairs == []
+
+
+def test_code_fence_and_trailing_text():
+    data, repairs = parse_model_json('```json\n{"title": "a"}\n```\n끝')
+    assert data == {"title": "a"}
+    assert "leading_text" in repairs
+    assert "trailing_text" in repairs
+
+
+def test_raw_newline_inside_string():
+    data, repairs = parse_model_json('{"content": "<p>첫 줄\n둘째 줄</p>"}')
+    assert data["content"] == "<p>첫 줄\n둘째 줄</p>"
+    assert "unescaped_newline" in repairs
+
+
+def test_unescaped_quote_in_html_attribute():
+    data, repairs = parse_model_json('{"content": "<a href="https://x.com">링크</a>", "title": "t"}')
+    assert data["content"] == '<a href="https://x.com">링크</a>'
+    assert data["title"] == "t"
+    assert "unescaped_quote" in repairs
+
+
+def test_trailing_comma():
+    data, repairs = parse_model_json('{"tags": ["a", "b",], "title": "t",}')
+    assert data == {"tags": ["a", "b"], "title": "t"}
+    assert "trailing_comma" in repairs
+
+
+def test_truncated_output_is_closed_and_reported():
+    data, repairs = parse_model_json('{"title": "a", "content": "<p>abc')
+    assert data == {"title": "a", "content": "<p>abc"}
+    assert repairs == ["truncated"]
+
+
+def test_only_missing_closers_is_not_a_truncation():
+    data, repairs = parse_model_json('{"title": "t", "tags": ["a", "b"], "image_keywords": "x"')
+    assert data == {"title": "t", "tags": ["a", "b"], "image_keywords": "x"}
+    assert repairs == ["missing_closer"]
+
+
+def test_incomplete_member_is_dropped():
+    data, repairs = parse_model_json('{"title": "t", "tags": ["a", tr')
+    assert data == {"title": "t", "tags": ["a"]}
+    assert repairs == ["truncated"]
+
+
+def test_no_object_raises():
+    with pytest.raises(ValueError):
+        parse_model_json("죄송합니다. 작성할 수 없습니다.")
+    with pytest.raises(ValueError):
+        parse_model_json("")
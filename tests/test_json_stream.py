@@ -0,0 +1,27 @@
+from json_stream import IncrementalFieldExtractor
+
+PAYLOAD = '```json\n{"title": "제목", "tags": ["a", "b"], "count": 3, "content": "<p>본문 \\"인용\\"</p>"}\n```'
+
+
+def test_fields_close_as_they_stream():
+    extractor = IncrementalFieldExtractor()
+    closed = []
+    for i in range(0, len(PAYLOAD), 7):
+        closed += extractor.feed(PAYLOAD[i:i + 7])
+    assert closed == ["title", "tags", "count", "content"]
+    assert extractor.fields == {"title": "제목", "tags": ["a", "b"], "count": 3, "content": '<p>본문 "인용"</p>'}
+
+
+def test_partial_string_value():
+    extractor = IncrementalFieldExtractor()
+    extractor.feed('{"title": "t", "content": "<p>안녕')
+    assert extractor.partial("content") == "<p>안녕"
+    assert extractor.partial("missing") is None
+
+
+def test_partial_drops_incomplete_escape():
+    extractor = IncrementalFieldExtractor()
+    extractor.feed('{"content": "a\\u00')
+    assert extractor.partial("content") == "a"
+    extractor.feed('e9 b"}')
+    assert extractor.fields["content"] == "aé b"
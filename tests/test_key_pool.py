@@ -0,0 +1,71 @@
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("dotenv")  # rate_limiter reads its defaults from config
+
+import key_pool  # noqa: E402
+from key_pool import KeyPool  # noqa: E402
+from model_health import ModelHealthTracker  # noqa: E402
+from rate_limiter import RateLimiter, key_id  # noqa: E402
+
+LIMIT = {"rpm": 5, "tpm": 100000, "rpd": 10}
+
+
+@pytest.fixture
+def health(monkeypatch):
+    tracker = ModelHealthTracker()
+    monkeypatch.setattr(key_pool, "HEALTH", tracker)
+    return tracker
+
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    limiter = RateLimiter(path=str(tmp_path / "limits.sqlite"), limits={}, default_limit=LIMIT, key_limits={})
+    monkeypatch.setattr(key_pool, "RATE_LIMITER", limiter)
+    return limiter
+
+
+def test_keys_are_deduplicated():
+    assert KeyPool(["a", "", "b", "a", None]).keys == ["a", "b"]
+
+
+def test_candidates_skip_keys_in_cooldown(health, limiter):
+    pool = KeyPool(["a", "b", "c"])
+    health.record_failure("a", "m", "429 quota exceeded")
+    health.record_failure("c", "m", "404 models/m is not found")
+    assert pool.candidates("m") == ["b"]
+    assert pool.candidates("other") == ["a", "b", "c"]
+
+
+def test_candidates_rank_by_remaining_quota(health, limiter):
+    pool = KeyPool(["a", "b", "c"])
+    for _ in range(3):
+        limiter.reserve("a", "m", 1)
+    limiter.reserve("b", "m", 1)
+    assert pool.candidates("m") == ["c", "b", "a"]
+
+
+def test_exhausted_daily_quota_goes_last(health, limiter):
+    pool = KeyPool(["a", "b"])
+    limiter.key_limits = {key_id("a"): {"*": {"rpd": 1}}}
+    limiter.reserve("a", "m", 1)
+    for _ in range(3):
+        limiter.reserve("b", "m", 1)
+    assert pool.candidates("m") == ["b", "a"]
+
+
+def test_candidates_prefer_faster_keys_on_equal_quota(health, limiter):
+    pool = KeyPool(["a", "b", "c"])
+    health.record_success("a", "m", 5.0)
+    health.record_success("b", "m", 1.0)
+    assert pool.candidates("m") == ["c", "b", "a"]  # Unmeasured first, then fastest
+
+
+def test_order_models_puts_primary_first(health):
+    pool = KeyPool(["a", "b"])
+    health.record_success("a", "fast", 1.0)
+    health.record_success("a", "slow", 5.0)
+    health.record_failure("a", "primary", "429 quota exceeded")
+    assert pool.order_models("primary", ["slow", "fast", "primary"]) == ["primary", "fast", "slow"]
+    health.record_failure("b", "primary", "404 not found")
+    assert pool.order_models("primary", ["slow", "fast", "primary"]) == ["fast", "slow"]
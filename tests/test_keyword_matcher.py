@@ -0,0 +1,34 @@
+from keyword_matcher import AhoCorasick, KeywordMatcher, get_matcher
+
+MAPPING = {"건강": "healthy", "건강식": "diet", "커피": "coffee", "it": "tech", "weight loss": "weight loss"}
+CURATED = ("sleep", "fitness", "coffee")
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    hits = sorted(AhoCorasick(["he", "she", "hers"]).find_all("ushers"))
+    assert hits == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_longer_korean_key_wins():
+    assert KeywordMatcher(MAPPING, CURATED).best("건강식 레시피") == "diet"
+
+
+def test_ascii_keys_match_whole_tokens_only():
+    matcher = KeywordMatcher(MAPPING, CURATED)
+    tags = [tag for tag, _ in matcher.match("fitness routine")]
+    assert "tech" not in tags
+    assert tags[0] == "fitness"
+
+
+def test_phrases_and_fallback_words():
+    matcher = KeywordMatcher(MAPPING, CURATED)
+    assert matcher.best("weight loss tips") == "weight loss"
+    assert matcher.best("volcano") == "volcano"
+    assert matcher.best("") is None
+
+
+def test_get_matcher_reloads_when_data_file_changes(tmp_path):
+    path = tmp_path / "keyword_map.json"
+    assert get_matcher(MAPPING, CURATED, str(path)).best("수면") is None
+    path.write_text('{"수면": "sleep"}', encoding="utf-8")
+    assert get_matcher(MAPPING, CURATED, str(path)).best("수면 습관") == "sleep"
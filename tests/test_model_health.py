@@ -0,0 +1,70 @@
+import pytest
+
+import model_health
+from model_health import ModelHealthTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_health.time, "time", lambda: now[0])
+    return now
+
+
+def test_classify():
+    assert ModelHealthTracker.classify("404 models/x is not found") == "not_found"
+    assert ModelHealthTracker.classify("429 Resource has been exhausted (e.g. check quota).") == "quota"
+    assert ModelHealthTracker.classify("503 The service is unavailable.") == "transient"
+
+
+def test_not_found_stays_open(clock):
+    health = ModelHealthTracker()
+    assert health.record_failure("k", "m", "404 models/m is not found") == "not_found"
+    clock[0] += 10 * 24 * 3600
+    assert not health.is_available("k", "m")
+    assert health.is_available("other", "m")
+    assert health.seconds_until_available("k", ["m"]) is None
+
+
+def test_quota_backoff_doubles(clock):
+    health = ModelHealthTracker()
+    for backoff in (60, 120, 240):
+        health.record_failure("k", "m", "429 quota exceeded")
+        clock[0] += backoff - 1
+        assert not health.is_available("k", "m")
+        clock[0] += 1
+        assert health.is_available("k", "m")
+    health.record_success("k", "m", 1.0)
+    health.record_failure("k", "m", "429 quota exceeded")
+    clock[0] += 60
+    assert health.is_available("k", "m")  # A success resets the strikes
+
+
+def test_quota_backoff_honours_retry_delay(clock):
+    health = ModelHealthTracker()
+    health.record_failure("k", "m", "429 quota exceeded [violations { } retry_delay { seconds: 90 }]")
+    clock[0] += 89
+    assert not health.is_available("k", "m")
+    assert health.seconds_until_available("k", ["m"]) == 2
+    clock[0] += 1
+    assert health.is_available("k", "m")
+
+
+def test_order_puts_primary_first_then_fastest(clock):
+    health = ModelHealthTracker()
+    health.record_success("k", "primary", 9.0)
+    health.record_success("k", "slow", 5.0)
+    health.record_success("k", "fast", 1.0)
+    models = ["slow", "unmeasured", "fast", "primary"]
+    assert health.order("k", "primary", models) == ["primary", "fast", "slow", "unmeasured"]
+    health.record_failure("k", "primary", "429 quota exceeded")
+    health.record_failure("k", "fast", "404 not found")
+    assert health.order("k", "primary", models) == ["slow", "unmeasured"]
+
+
+def test_latency_is_an_ewma():
+    health = ModelHealthTracker()
+    assert health.latency("k", "m") is None
+    health.record_success("k", "m", 10.0)
+    health.record_success("k", "m", 0.0)
+    assert health.latency("k", "m") == pytest.approx(7.0)
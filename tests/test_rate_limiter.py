@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("dotenv")  # rate_limiter reads its defaults from config
+
+from rate_limiter import RateLimiter, estimate_tokens, key_id  # noqa: E402
+
+LIMIT = {"rpm": 2, "tpm": 1000, "rpd": 3}
+
+
+def make_limiter(tmp_path, key_limits=None):
+    return RateLimiter(path=str(tmp_path / "limits.sqlite"), limits={"m": LIMIT}, default_limit=LIMIT, key_limits=key_limits or {})
+
+
+def test_key_id_hides_the_key():
+    assert key_id("secret") == key_id("secret")
+    assert "secret" not in key_id("secret")
+    assert len(key_id("secret")) == 16
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("가" * 100, output_tokens=10) == 60
+
+
+def test_minute_bucket_asks_to_wait(tmp_path):
+    limiter = make_limiter(tmp_path)
+    assert limiter.reserve("k", "m", 10) == (0, None)
+    assert limiter.reserve("k", "m", 10) == (0, None)
+    wait, reason = limiter.reserve("k", "m", 10)
+    assert reason is None
+    assert 0 < wait <= 30
+    assert limiter.remaining("k", "m")["rpd"] == 1
+
+
+def test_keys_have_separate_buckets(tmp_path):
+    limiter = make_limiter(tmp_path)
+    limiter.reserve("a", "m", 10)
+    limiter.reserve("a", "m", 10)
+    assert limiter.reserve("b", "m", 10) == (0, None)
+
+
+def test_daily_quota_and_acquire(tmp_path):
+    limiter = RateLimiter(path=str(tmp_path / "limits.sqlite"), limits={}, default_limit={"rpm": 100, "tpm": 10 ** 6, "rpd": 1})
+    assert limiter.acquire("k", "m", 10, max_wait=0) == (True, None)
+    allowed, reason = limiter.acquire("k", "m", 10, max_wait=0)
+    assert not allowed
+    assert "오늘 요청 한도" in reason
+
+
+def test_record_usage_refunds_overestimate(tmp_path):
+    limiter = make_limiter(tmp_path)
+    limiter.reserve("k", "m", 800)
+    assert limiter.remaining("k", "m")["tpm"] < 300
+    limiter.record_usage("k", "m", reserved_tokens=800, actual_tokens=100)
+    assert limiter.remaining("k", "m")["tpm"] >= 900
+
+
+def test_per_key_overrides(tmp_path):
+    limiter = make_limiter(tmp_path, {key_id("paid"): {"*": {"rpd": 100}, "m": {"rpm": 50}}})
+    assert limiter.limit_for("paid", "m") == {"rpm": 50, "tpm": 1000, "rpd": 100}
+    assert limiter.limit_for("paid", "other") == {"rpm": 2, "tpm": 1000, "rpd": 100}
+    assert limiter.limit_for("free", "m") == LIMIT
+    for _ in range(3):
+        assert limiter.reserve("paid", "m", 10) == (0, None)
+    assert limiter.reserve("free", "m", 10) == (0, None)
+    assert limiter.remaining("paid", "m")["rpd"] == 97
+    assert limiter.remaining("free", "m")["rpd"] == 2
@@ -0,0 +1,53 @@
+import time
+
+from response_cache import ResponseCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResponseCache(path=str(tmp_path / "responses.sqlite"), **kwargs)
+
+
+def test_key_depends_on_every_input():
+    base = ResponseCache.make_key("m", "prompt", {"a": 1}, True)
+    assert base == ResponseCache.make_key("m", "prompt", {"a": 1}, True)
+    assert base != ResponseCache.make_key("m2", "prompt", {"a": 1}, True)
+    assert base != ResponseCache.make_key("m", "prompt", {"a": 1}, False)
+    assert base != ResponseCache.make_key("m", "prompt", {"a": 1}, True, system_instruction="sys")
+
+
+def test_put_get_and_stats(tmp_path):
+    cache = make_cache(tmp_path)
+    assert cache.get("k") is None
+    cache.put("k", "m", "본문")
+    assert cache.get("k") == "본문"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = make_cache(tmp_path, ttl=0.05)
+    cache.put("k", "m", "x")
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted_over_budget(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=10)
+    cache.put("old", "m", "aaaa")
+    time.sleep(0.01)
+    cache.put("new", "m", "bbbb")
+    time.sleep(0.01)
+    cache.get("old")  # Touch: "new" is now the least recently used
+    time.sleep(0.01)
+    cache.put("third", "m", "cccc")
+    assert cache.get("new") is None
+    assert cache.get("old") == "aaaa"
+    assert cache.get("third") == "cccc"
+
+
+def test_clear(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("k", "m", "x")
+    cache.clear()
+    assert cache.get("k") is None
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+
+import pytest
+
+from template_store import FileLock, TemplateStore, atomic_write_json
+
+
+class FakeRemote:
+    def __init__(self, fail_times=0, delay=0.0):
+        self.fail_times = fail_times
+        self.delay = delay
+        self.batches = []
+
+    def apply_changes(self, changes):
+        time.sleep(self.delay)
+        if self.fail_times:
+            self.fail_times -= 1
+            return False
+        self.batches.append(dict(changes))
+        return True
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.02)
+    raise AssertionError("condition not met")
+
+
+def test_atomic_write_json(tmp_path):
+    path = tmp_path / "data.json"
+    atomic_write_json(str(path), {"서식": "내용"})
+    assert read(path) == {"서식": "내용"}
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_file_lock_times_out_and_breaks_stale_locks(tmp_path):
+    path = str(tmp_path / "x.lock")
+    with FileLock(path):
+        with pytest.raises(TimeoutError):
+            FileLock(path, timeout=0.1).acquire()
+    with FileLock(path):
+        pass  # Released: can be taken again
+    with open(path, "w"):
+        pass  # Abandoned lock file
+    with FileLock(path, timeout=0.5, stale=0.0):
+        pass
+
+
+def test_edits_are_visible_at_once_and_flushed_later(tmp_path):
+    path = tmp_path / "templates.json"
+    store = TemplateStore(str(path), debounce=0.05)
+    revision = store.revision
+    store.set("a", "1")
+    store.set("b", "2")
+    store.delete("a")
+    assert store.load() == {"b": "2"}
+    assert store.revision > revision
+    wait_until(path.exists)
+    assert read(path) == {"b": "2"}
+
+
+def test_flush_keeps_other_writers_changes(tmp_path):
+    path = tmp_path / "templates.json"
+    atomic_write_json(str(path), {"theirs": "x"})
+    store = TemplateStore(str(path), debounce=10)
+    store.set("mine", "y")
+    atomic_write_json(str(path), {"theirs": "x", "other": "z"})  # Another process wrote meanwhile
+    assert store.flush()
+    assert read(path) == {"theirs": "x", "other": "z", "mine": "y"}
+
+
+def test_remote_sync_is_coalesced_and_retried(tmp_path):
+    remote = FakeRemote(fail_times=1)
+    store = TemplateStore(str(tmp_path / "templates.json"), remote=remote, debounce=0.05)
+    store.set("a", "1")
+    store.set("b", "2")
+    wait_until(lambda: remote.batches, timeout=10)
+    assert remote.batches == [{"a": "1", "b": "2"}]
+    assert store.pending_remote() == 0
+
+
+def test_pending_deletes_cover_in_flight_batches(tmp_path):
+    remote = FakeRemote(delay=0.3)
+    store = TemplateStore(str(tmp_path / "templates.json"), remote=remote, debounce=0.05)
+    store.delete("gone")
+    assert store.pending_deletes() == {"gone"}
+    time.sleep(0.15)  # Batch handed to the remote, not committed yet
+    assert store.pending_deletes() == {"gone"}
+    wait_until(lambda: remote.batches)
+    wait_until(lambda: not store.pending_deletes())
+
+
+def test_apply_remote_only_missing_keeps_local_versions(tmp_path):
+    remote = FakeRemote()
+    store = TemplateStore(str(tmp_path / "templates.json"), remote=remote, debounce=0.05)
+    store.set("shared", "local")
+    store.apply_remote({"shared": "cloud", "new": "cloud"}, only_missing=True)
+    assert store.load() == {"shared": "local", "new": "cloud"}
+    wait_until(lambda: remote.batches)
+    assert remote.batches == [{"shared": "local"}]  # Mirrored changes are not sent back
+
+
+def test_concurrent_sets_all_land(tmp_path):
+    path = tmp_path / "templates.json"
+    store = TemplateStore(str(path), debounce=0.01)
+    threads = [threading.Thread(target=store.set, args=(f"t{i}", str(i))) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.flush()
+    assert read(path) == {f"t{i}": str(i) for i in range(20)}
@@ -0,0 +1,24 @@
+from templates import TEMPLATE_HTML, CompiledTemplate, compile_template
+
+
+def test_render_substitutes_every_placeholder():
+    compiled = compile_template("주제: {topic} / 다시 {topic}")
+    assert compiled.placeholders == ["topic", "topic"]
+    assert compiled.render(topic="커피") == "주제: 커피 / 다시 커피"
+
+
+def test_custom_templates_keep_braces_as_typed():
+    compiled = compile_template("CSS {{color: red}} {unknown} {topic}")
+    assert compiled.render(topic="T") == "CSS {{color: red}} {unknown} T"
+    assert compiled.unknown == ["unknown"]
+
+
+def test_builtin_templates_unescape_braces():
+    rendered = compile_template(TEMPLATE_HTML).render(topic="T")
+    assert "{{" not in rendered and "}}" not in rendered
+    assert "T" in rendered
+
+
+def test_problems_reports_missing_topic():
+    assert compile_template("주제 없음").problems() == ["{topic} 자리표시자가 없습니다."]
+    assert CompiledTemplate("{topic}").problems() == []
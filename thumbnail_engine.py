@@ -0,0 +1,167 @@
+import functools
+import hashlib
+import io
+import random
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+CANVAS_SIZE = 800
+# Premium vibrant palettes (Deep Blue, Red, Dark Grey, Purple, Green, Orange)
+BG_COLORS = ["#0052cc", "#d32f2f", "#1a1a1b", "#4527a0", "#1b5e20", "#e65100"]
+BADGE_OPTIONS = ["핵심 요약!", "위험 신호?", "깜짝 놀랄", "거의 모르는", "초간단 해결", "전문가 추천"]
+
+MAIN_FONT_SIZE = 145  # Maximum impact size
+BADGE_FONT_SIZE = 45
+LINE_HEIGHT = 175
+STROKE_WIDTH = 6
+
+
+@functools.lru_cache(maxsize=32)
+def load_font(path, size):
+    """FreeType objects are loaded once per (path, size) for the whole process."""
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
+
+
+def pick_font_path(font_paths):
+    """
+    Returns the first loadable font. `font_paths` is already ordered by preference
+    (bold, Hangul-capable first) by the font index.
+    Returns None when nothing can be loaded (Pillow's default bitmap font is used).
+    """
+    for f_path in font_paths:
+        try:
+            load_font(f_path, MAIN_FONT_SIZE)
+            return f_path
+        except OSError:
+            continue
+    return None
+
+
+def normalize_text(text):
+    """Smart cleaning: drops '>' and quotes, collapses whitespace."""
+    return " ".join(text.replace(">", "").replace("\"", "").replace("'", "").split())
+
+
+def choose_style(text, seed=0):
+    """
+    Deterministic (palette, badge) choice for a thumbnail.
+    The same text and seed always give the same style; every new seed rotates to a
+    different palette, so "regenerate" changes the picture on purpose.
+    """
+    normalized = normalize_text(text)
+    base = int(hashlib.md5(normalized.encode("utf-8")).hexdigest(), 16)
+    rng = random.Random(f"{normalized}|{seed}")
+    bg_hex = BG_COLORS[(base + seed) % len(BG_COLORS)]
+    badge_text = rng.choice(BADGE_OPTIONS)
+    return bg_hex, badge_text
+
+
+def wrap_lines(clean_text):
+    """Ultra tight wrap for big text, max 3 lines for impact."""
+    lines = []
+    current_line = ""
+    for word in clean_text.split():
+        if len(current_line + word) <= 6:
+            current_line += (word + " ")
+        else:
+            if current_line: lines.append(current_line.strip())
+            current_line = word + " "
+    if current_line: lines.append(current_line.strip())
+    return lines[:3]
+
+
+class ThumbnailRenderer:
+    """
+    Renders the 800x800 YouTube-style text thumbnail.
+    Fonts are resolved once and the outline uses FreeType's native stroke
+    instead of dozens of offset draw.text calls per line.
+    """
+
+    def __init__(self, font_path):
+        self.font_path = font_path
+        self.font = load_font(font_path, MAIN_FONT_SIZE)
+        self.badge_font = load_font(font_path, BADGE_FONT_SIZE)
+
+    def render(self, text, bg_hex, badge_text):
+        """Returns a PIL RGB image."""
+        size = CANVAS_SIZE
+        img = Image.new('RGB', (size, size), color=bg_hex)
+        draw = ImageDraw.Draw(img)
+
+        # 1. Text Preparation & Smart Cleaning
+        lines = wrap_lines(normalize_text(text))
+
+        # 2. Top Badge (Yellow/Orange bubble with black text)
+        badge_w = 280
+        badge_h = 70
+        badge_x = (size - badge_w) // 2
+        badge_y = 100
+        draw.rounded_rectangle([badge_x, badge_y, badge_x + badge_w, badge_y + badge_h], radius=35, fill="#fdd835", outline="#111111", width=3)
+        try:
+            l, t, r, b = draw.textbbox((0, 0), badge_text, font=self.badge_font)
+            bw, bh = r, b
+            draw.text(((size - bw) // 2, badge_y + (badge_h - bh) // 2 - 5), badge_text, fill="#111111", font=self.badge_font)
+        except Exception: pass
+
+        # 3. Main Bold Text with heavy outline
+        total_text_height = len(lines) * LINE_HEIGHT
+        start_y = (size - total_text_height) // 2 + 50  # Shift down for badge
+
+        for i, line in enumerate(lines):
+            try:
+                l, t, r, b = draw.textbbox((0, 0), line, font=self.font)
+                w = r - l
+            except Exception: w = 400
+
+            x = (size - w) // 2
+            y = start_y + (i * LINE_HEIGHT)
+
+            # Alternating colors: White and Yellow, single pass with native stroke
+            main_color = "white" if i % 2 == 0 else "#fff176"
+            draw.text((x, y), line, fill=main_color, font=self.font, stroke_width=STROKE_WIDTH, stroke_fill="#000000")
+
+        return img
+
+    def render_jpeg(self, text, bg_hex, badge_text, quality=92):
+        """Returns the thumbnail encoded as JPEG bytes."""
+        buffered = io.BytesIO()
+        self.render(text, bg_hex, badge_text).save(buffered, format="JPEG", quality=quality)
+        return buffered.getvalue()
+
+    def benchmark(self, text="다이어트 식단 완전 정복 >", rounds=30):
+        """
+        Measures full renders (draw + JPEG encode) per second.
+        Returns {"rounds", "seconds", "renders_per_sec"}.
+        """
+        started = time.perf_counter()
+        for i in range(rounds):
+            self.render_jpeg(text, BG_COLORS[i % len(BG_COLORS)], BADGE_OPTIONS[i % len(BADGE_OPTIONS)])
+        elapsed = time.perf_counter() - started
+        return {"rounds": rounds, "seconds": elapsed, "renders_per_sec": rounds / elapsed if elapsed else 0.0}
+
+
+@functools.lru_cache(maxsize=4)
+def get_renderer(font_path):
+    """Process-wide renderer per font."""
+    return ThumbnailRenderer(font_path)
+
+
+def render_variant_job(job):
+    """
+    Process-pool entry point: job = (font_path, text, bg_hex, badge_text).
+    Each worker process keeps its own renderer/font cache across jobs.
+    """
+    font_path, text, bg_hex, badge_text = job
+    return get_renderer(font_path).render_jpeg(text, bg_hex, badge_text)
+
+
+if __name__ == "__main__":
+    # python thumbnail_engine.py  -> prints renders per second
+    from image_generator import ImageGenerator
+    renderer = ImageGenerator().get_renderer()
+    result = renderer.benchmark()
+    print(f"Font: {renderer.font_path}")
+    print(f"{result['rounds']} renders in {result['seconds']:.2f}s -> {result['renders_per_sec']:.1f} renders/sec")
@@ -0,0 +1,122 @@
+import base64
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+CACHE_DIR = os.path.join(".cache", "thumbnails")
+
+
+class ThumbnailHandle:
+    """
+    Reference to a rendered thumbnail instead of a base64 data URL.
+    `data` hands out the cached JPEG bytes (the same object held by the LRU, no copy);
+    `path` is the on-disk file. A data URL is only built when to_data_url() is called.
+    If the entry was evicted, `rerender` rebuilds it.
+    """
+
+    def __init__(self, key, cache, rerender=None):
+        self.key = key
+        self.cache = cache
+        self._rerender = rerender
+
+    @property
+    def path(self):
+        return self.cache.path_for(self.key)
+
+    @property
+    def data(self):
+        data = self.cache.get(self.key)
+        if data is None and self._rerender:
+            data = self._rerender()
+            self.cache.put(self.key, data)
+        return data
+
+    def to_data_url(self):
+        return "data:image/jpeg;base64," + base64.b64encode(self.data).decode("utf-8")
+
+
+class ThumbnailCache:
+    """
+    Rendered thumbnail cache: a bounded in-memory LRU backed by JPEG files on disk.
+    Keys come from make_key(normalized text, palette, badge, font), so the same post
+    viewed again (or after a rerun/restart) never re-renders or re-encodes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_items=64, max_disk_files=500):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_disk_files = max_disk_files
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text, bg_hex, badge_text, font_path):
+        payload = "\x1f".join([text, bg_hex, badge_text, font_path or "default"])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns JPEG bytes from memory or disk, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path_for(key))
+            self._evict_disk()
+        except OSError as e:
+            print(f"Thumbnail cache write failed: {e}")
+
+    def _evict_disk(self):
+        files = [e for e in os.scandir(self.directory) if e.name.endswith(".jpg")]
+        if len(files) <= self.max_disk_files:
+            return
+        files.sort(key=lambda e: e.stat().st_mtime)
+        for entry in files[:len(files) - self.max_disk_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def get_or_render(self, key, render_fn):
+        """
+        Returns a ThumbnailHandle for `key`, calling render_fn() and storing the result on a miss.
+        """
+        if self.get(key) is None:
+            self.put(key, render_fn())
+        return ThumbnailHandle(key, self, rerender=render_fn)
+
+
+# Shared by every ImageGenerator in the process
+THUMBNAIL_CACHE = ThumbnailCache()